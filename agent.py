@@ -417,7 +417,7 @@ class DeepurgeAgent(FileSystemEventHandler):
                                 file_size=manifest["file_size"],
                                 encrypted_size=manifest["encrypted_size"],
                                 mime_type=manifest.get("mime_type", ""),
-                                sha256=manifest.get("sha256", ""),
+                                sha256=manifest.get("content_hash", ""),
                                 walrus_url=manifest.get("walrus_url", ""),
                             )
                             print(f"   {Fore.CYAN}🔐 Vault backup:{Style.RESET_ALL} {manifest['blob_id'][:24]}…")
@@ -380,7 +380,7 @@ def vault_upload():
                 manifest["uploaded_at"], manifest["file_name"], str(tmp_path),
                 manifest["blob_id"], manifest["key_hex"], manifest["nonce_hex"],
                 manifest["file_size"], manifest["encrypted_size"],
-                manifest.get("mime_type", ""), manifest.get("sha256", ""),
+                manifest.get("mime_type", ""), manifest.get("content_hash", ""),
                 manifest.get("walrus_url", ""), share_token, "",
             ))
             conn.commit()
@@ -523,7 +523,7 @@ if ($("#btnVaultUpload")) {
             // Show result
             $("#vaultResult").classList.remove("hidden");
             $("#vaultBlobId").textContent = data.blob_id || "–";
-            $("#vaultSha256").textContent = (data.sha256 || "–").slice(0, 32) + "…";
+            $("#vaultSha256").textContent = (data.content_hash || data.sha256 || "–").slice(0, 32) + "…";
             $("#vaultEncSize").textContent = formatBytes(data.encrypted_size || 0);
             $("#vaultKeyHex").textContent = data.key_hex || "–";
             $("#vaultShareLink").value = data.share_link || "";
@@ -574,6 +574,50 @@ if ($("#btnVaultSyncFolder")) {
     });
 }
 
+// Share tokens are unpadded base64url. v1 is packed binary (see vault.py):
+// "DV1" | flags | nonce_len | blob_len | name_len (u16 BE) | key[32] | nonce | blob | name
+// Anything else is the legacy UTF-8 JSON ({b, k, n, f}).
+const hexOf = bytes => Array.from(bytes, x => x.toString(16).padStart(2, "0")).join("");
+const bytesOfHex = hex => Uint8Array.from(hex.match(/../g) || [], h => parseInt(h, 16));
+const b64url = bytes => btoa(String.fromCharCode(...bytes)).replace(/\+/g,"-").replace(/\//g,"_").replace(/=+$/,"");
+const unb64url = text => Uint8Array.from(atob(text.replace(/-/g,"+").replace(/_/g,"/")), c => c.charCodeAt(0));
+
+function decodeShareToken(token) {
+    const bytes = unb64url(token);
+    if (bytes[0] !== 0x44 || bytes[1] !== 0x56 || bytes[2] !== 0x31) {
+        return JSON.parse(new TextDecoder().decode(bytes));
+    }
+    const flags = bytes[3], nonceLen = bytes[4], blobLen = bytes[5];
+    const nameLen = (bytes[6] << 8) | bytes[7];
+    let pos = 8;
+    const k = hexOf(bytes.subarray(pos, pos += 32));
+    const n = hexOf(bytes.subarray(pos, pos += nonceLen));
+    const blob = bytes.subarray(pos, pos += blobLen);
+    const f = new TextDecoder().decode(bytes.subarray(pos, pos + nameLen));
+    const b = (flags & 1) ? b64url(blob) : new TextDecoder().decode(blob);
+    return { b, k, n, f };
+}
+
+function encodeShareToken(blobId, keyHex, nonceHex, fileName) {
+    let blob, flags = 0;
+    try {
+        const raw = unb64url(blobId);
+        if (b64url(raw) === blobId) { blob = raw; flags = 1; }
+    } catch(e) {}
+    if (!flags) blob = new TextEncoder().encode(blobId);
+    const key = bytesOfHex(keyHex), nonce = bytesOfHex(nonceHex);
+    const name = new TextEncoder().encode(fileName || "");
+    if (key.length !== 32 || blob.length > 255 || nonce.length > 255 || name.length > 65535) {
+        const json = new TextEncoder().encode(JSON.stringify({b:blobId,k:keyHex,n:nonceHex,f:fileName}));
+        return b64url(json);
+    }
+    const out = new Uint8Array(8 + 32 + nonce.length + blob.length + name.length);
+    out.set([0x44, 0x56, 0x31, flags, nonce.length, blob.length, name.length >> 8, name.length & 0xff]);
+    let pos = 8;
+    for (const part of [key, nonce, blob, name]) { out.set(part, pos); pos += part.length; }
+    return b64url(out);
+}
+
 // Decrypt & download
 if ($("#btnVaultDecrypt")) {
     $("#btnVaultDecrypt").addEventListener("click", async () => {
@@ -585,7 +629,7 @@ if ($("#btnVaultDecrypt")) {
         if (input.includes("#")) {
             const token = input.split("#").pop();
             try {
-                const decoded = JSON.parse(atob(token.replace(/-/g,"+").replace(/_/g,"/")));
+                const decoded = decodeShareToken(token);
                 blobId = decoded.b;
                 keyHex = decoded.k;
                 nonceHex = decoded.n;
@@ -640,8 +684,7 @@ async function loadVaultFiles() {
 }
 
 function copyVaultShare(blobId, keyHex, nonceHex, fileName) {
-    const payload = JSON.stringify({b:blobId,k:keyHex,n:nonceHex,f:fileName});
-    const token = btoa(payload).replace(/\+/g,"-").replace(/\//g,"_").replace(/=+$/,"");
+    const token = encodeShareToken(blobId, keyHex, nonceHex, fileName);
     const link = `${location.origin}/vault/share#${token}`;
     navigator.clipboard.writeText(link).then(() => alert("Share link copied!"));
 }
@@ -651,7 +694,7 @@ function checkShareLink() {
     if (location.hash && location.pathname.includes("/vault/share")) {
         const token = location.hash.slice(1);
         try {
-            const decoded = JSON.parse(atob(token.replace(/-/g,"+").replace(/_/g,"/")));
+            const decoded = decodeShareToken(token);
             // Switch to vault view
             $$(".nav-item").forEach(n => n.classList.remove("active"));
             document.querySelector('[data-view="vault"]').classList.add("active");
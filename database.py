@@ -9,10 +9,29 @@ import sqlite3
 import json
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator
 from contextlib import contextmanager
 
 
+# Hot-path statements kept as constants so every call hands sqlite3 the
+# identical SQL text and hits the per-connection statement cache.
+_INSERT_ACTION_SQL = """
+    INSERT INTO actions (
+        timestamp, action_type, original_path, new_path, file_name,
+        category, file_size, file_hash, walrus_blob_id, status, error_message
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_UPDATE_STATISTICS_SQL = """
+    UPDATE statistics
+    SET total_files_processed = total_files_processed + 1,
+        total_bytes_processed = total_bytes_processed + ?,
+        last_updated = ?
+    WHERE id = 1
+"""
+
+_MARK_UPLOADED_SQL = "UPDATE actions SET walrus_blob_id = ? WHERE id = ?"
+
 class Database:
     """SQLite database handler for action logging"""
     
@@ -161,7 +180,7 @@ class Database:
     @contextmanager
     def _get_connection(self):
         """Context manager for database connections"""
-        conn = sqlite3.connect(str(self.db_path))
+        conn = sqlite3.connect(str(self.db_path), cached_statements=256)
         conn.row_factory = sqlite3.Row
         try:
             yield conn
@@ -187,16 +206,13 @@ class Database:
         Returns:
             The ID of the inserted record
         """
+        # One clock read shared by the action row and the statistics row
+        now = datetime.utcnow().isoformat()
         with self._get_connection() as conn:
             cursor = conn.cursor()
             
-            cursor.execute("""
-                INSERT INTO actions (
-                    timestamp, action_type, original_path, new_path, file_name,
-                    category, file_size, file_hash, walrus_blob_id, status, error_message
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                datetime.utcnow().isoformat() + "Z",
+            cursor.execute(_INSERT_ACTION_SQL, (
+                now + "Z",
                 action_type,
                 original_path,
                 new_path,
@@ -210,13 +226,7 @@ class Database:
             ))
             
             # Update statistics
-            cursor.execute("""
-                UPDATE statistics 
-                SET total_files_processed = total_files_processed + 1,
-                    total_bytes_processed = total_bytes_processed + ?,
-                    last_updated = ?
-                WHERE id = 1
-            """, (file_size, datetime.utcnow().isoformat()))
+            cursor.execute(_UPDATE_STATISTICS_SQL, (file_size, now))
             
             conn.commit()
             return cursor.lastrowid
@@ -256,8 +266,12 @@ class Database:
             conn.commit()
             return cursor.lastrowid
     
-    def get_pending_actions(self, limit: int = 100) -> List[Dict[str, Any]]:
-        """Get actions that haven't been uploaded to Walrus yet"""
+    def iter_pending_actions(self, limit: int = 100) -> Iterator[Dict[str, Any]]:
+        """
+        Yield actions that haven't been uploaded to Walrus yet, one at a time.
+
+        The connection stays open until the generator is exhausted or closed.
+        """
         with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
@@ -266,7 +280,12 @@ class Database:
                 ORDER BY timestamp ASC
                 LIMIT ?
             """, (limit,))
-            return [dict(row) for row in cursor.fetchall()]
+            for row in cursor:
+                yield dict(row)
+
+    def get_pending_actions(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Get actions that haven't been uploaded to Walrus yet"""
+        return list(self.iter_pending_actions(limit))
     
     def get_action_count(self) -> int:
         """Get total number of actions without Walrus upload"""
@@ -278,8 +297,8 @@ class Database:
             """)
             return cursor.fetchone()['count']
     
-    def get_recent_actions(self, limit: int = 50) -> List[Dict[str, Any]]:
-        """Get most recent actions"""
+    def iter_recent_actions(self, limit: int = 50) -> Iterator[Dict[str, Any]]:
+        """Yield most recent actions, one at a time"""
         with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
@@ -287,7 +306,12 @@ class Database:
                 ORDER BY timestamp DESC
                 LIMIT ?
             """, (limit,))
-            return [dict(row) for row in cursor.fetchall()]
+            for row in cursor:
+                yield dict(row)
+
+    def get_recent_actions(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Get most recent actions"""
+        return list(self.iter_recent_actions(limit))
     
     def get_statistics(self) -> Dict[str, Any]:
         """Get overall statistics"""
@@ -341,13 +365,12 @@ class Database:
                 GROUP BY category
             """, (f"{date}%",))
             
-            rows = cursor.fetchall()
-            
             categories = {}
             total_files = 0
             total_size = 0
             
-            for row in rows:
+            # Read columns straight off the sqlite3.Row; no per-row dict
+            for row in cursor:
                 categories[row['category']] = row['category_count']
                 total_files += row['category_count']
                 if row['total_size']:
@@ -397,12 +420,12 @@ class Database:
         """Mark multiple actions as uploaded to Walrus"""
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            placeholders = ','.join('?' * len(action_ids))
-            cursor.execute(f"""
-                UPDATE actions 
-                SET walrus_blob_id = ?
-                WHERE id IN ({placeholders})
-            """, [blob_id] + action_ids)
+            # Constant SQL text instead of an IN (?, ?, ...) list whose
+            # length — and therefore cache key — changes with every batch
+            cursor.executemany(
+                _MARK_UPLOADED_SQL,
+                [(blob_id, action_id) for action_id in action_ids],
+            )
             conn.commit()
 
     # ── Vault Methods (Path 2) ────────────────────────────
@@ -8,8 +8,53 @@ Project: Sui Hackathon 2026
 import fitz  # PyMuPDF
 from PIL import Image
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import multiprocessing
+import os
 import re
-from typing import Dict, Optional, List
+import struct
+from typing import Dict, Optional, List, Tuple
+
+# JPEG start-of-frame markers that carry the image dimensions
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3}
+
+
+def _fast_dims(path: Path) -> Optional[Tuple[int, int]]:
+    """
+    Read (width, height) straight from the PNG/GIF/JPEG header.
+
+    Returns None for any other format so the caller can fall back to PIL.
+    """
+    with open(path, "rb") as f:
+        head = f.read(64)
+        if head.startswith(b"\x89PNG\r\n\x1a\n") and len(head) >= 24:
+            return struct.unpack(">II", head[16:24])
+        if head[:6] in (b"GIF87a", b"GIF89a") and len(head) >= 10:
+            return struct.unpack("<HH", head[6:10])
+        if not head.startswith(b"\xff\xd8"):
+            return None
+
+        # JPEG: walk the marker segments until a SOF0–SOF3 frame header
+        f.seek(2)
+        while True:
+            marker = f.read(2)
+            if len(marker) < 2 or marker[0] != 0xFF:
+                return None
+            if marker[1] == 0xFF:  # fill byte, re-sync on the next one
+                f.seek(-1, 1)
+                continue
+            seg = f.read(2)
+            if len(seg) < 2:
+                return None
+            seg_len = struct.unpack(">H", seg)[0]
+            if marker[1] in _JPEG_SOF_MARKERS:
+                frame = f.read(5)
+                if len(frame) < 5:
+                    return None
+                height, width = struct.unpack(">HH", frame[1:5])
+                return width, height
+            f.seek(seg_len - 2, 1)
+
 
 class DeepIntelligence:
     """Provides deep analysis of file contents to improve classification."""
@@ -22,6 +67,28 @@ class DeepIntelligence:
         "Legal": [r"agreement", r"terms", r"privacy", r"policy", r"license", r"copyright", r"litigation"]
     }
 
+    # One alternation per category, compiled once at import time
+    _COMPILED = {
+        category: re.compile("|".join(patterns))
+        for category, patterns in DOC_KEYWORDS.items()
+    }
+
+    @staticmethod
+    def _iter_document_text(file_path: Path):
+        """Yield lowercased text one chunk (PDF page) at a time."""
+        if file_path.suffix.lower() == ".pdf":
+            doc = fitz.open(str(file_path))
+            try:
+                # Only read the first 2 pages for performance
+                for i in range(min(2, len(doc))):
+                    yield doc[i].get_text().lower()
+            finally:
+                doc.close()
+        else:
+            # Treat as text file
+            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                yield f.read(2000).lower()
+
     @staticmethod
     def analyze_document(file_path: Path) -> Dict:
         """Extracts text and identifies sub-categories for documents."""
@@ -30,28 +97,20 @@ class DeepIntelligence:
         content_preview = ""
 
         try:
-            if file_path.suffix.lower() == ".pdf":
-                doc = fitz.open(str(file_path))
-                # Only read the first 2 pages for performance
-                text = ""
-                for i in range(min(2, len(doc))):
-                    text += doc[i].get_text().lower()
-                doc.close()
-            else:
-                # Treat as text file
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    text = f.read(2000).lower()
-            
-            content_preview = text[:200].replace("\n", " ")
+            pages = DeepIntelligence._iter_document_text(file_path)
+            for text in pages:
+                if not content_preview:
+                    content_preview = text[:200].replace("\n", " ")
 
-            # Search for category keywords
-            for category, patterns in DeepIntelligence.DOC_KEYWORDS.items():
-                for pattern in patterns:
-                    if re.search(pattern, text):
+                # Search for category keywords, stop at the first hit
+                for category, rx in DeepIntelligence._COMPILED.items():
+                    match = rx.search(text)
+                    if match:
                         sub_category = category
-                        keywords_found.append(pattern)
+                        keywords_found.append(match.group(0))
                         break
                 if sub_category != "General":
+                    pages.close()  # skip extracting the remaining pages
                     break
 
         except Exception as e:
@@ -70,20 +129,24 @@ class DeepIntelligence:
         tags = []
         
         try:
-            with Image.open(file_path) as img:
-                width, height = img.size
-                ratio = width / height
-                
-                # Identify Screenshots (Common desktop aspect ratios)
-                if width in [1920, 2560, 3840, 1366] or (ratio > 1.7 and ratio < 1.8):
-                    sub_category = "Screenshots"
-                # Identify Portraits vs Landscapes
-                elif ratio < 0.8:
-                    sub_category = "Portraits"
-                elif ratio > 1.2:
-                    sub_category = "Landscapes"
-                
-                tags.append(f"{width}x{height}")
+            dims = _fast_dims(file_path)
+            if dims is None:
+                # Exotic format — let PIL probe the header
+                with Image.open(file_path) as img:
+                    dims = img.size
+            width, height = dims
+            ratio = width / height
+            
+            # Identify Screenshots (Common desktop aspect ratios)
+            if width in [1920, 2560, 3840, 1366] or (ratio > 1.7 and ratio < 1.8):
+                sub_category = "Screenshots"
+            # Identify Portraits vs Landscapes
+            elif ratio < 0.8:
+                sub_category = "Portraits"
+            elif ratio > 1.2:
+                sub_category = "Landscapes"
+            
+            tags.append(f"{width}x{height}")
                 
         except Exception as e:
             print(f"⚠️ Intel Error (Img): {e}")
@@ -94,6 +157,33 @@ class DeepIntelligence:
             "preview": ""
         }
 
+    @staticmethod
+    def batch_analyze(paths: List[Path], kind: str, workers: int = 8) -> List[Dict]:
+        """
+        Run analyze_document / analyze_image over many files concurrently.
+
+        Images only need a header read (no PyMuPDF), so they run on a
+        thread pool.  PyMuPDF is not thread-safe, so documents go to a
+        process pool instead (started with forkserver/spawn, never fork,
+        since the agent's watchdog threads may be running).  Results keep
+        the order of *paths*.
+        """
+        if kind == "image":
+            workers = max(1, min(workers, 32, (os.cpu_count() or 1) * 4))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(DeepIntelligence.analyze_image, paths))
+        if kind != "document":
+            raise ValueError(f"Unknown analysis kind: {kind!r}")
+
+        paths = list(paths)
+        workers = max(1, min(workers, os.cpu_count() or 1, len(paths)))
+        if workers == 1:
+            return [DeepIntelligence.analyze_document(p) for p in paths]
+        methods = multiprocessing.get_all_start_methods()
+        ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as executor:
+            return list(executor.map(DeepIntelligence.analyze_document, paths, chunksize=4))
+
     @staticmethod
     def get_smart_name(file_path: Path, intelligence: Dict) -> str:
         """Generates a descriptive name based on intelligence data."""
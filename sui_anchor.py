@@ -18,9 +18,11 @@ Project: Sui Hackathon 2026
 import json
 import hashlib
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Set, Tuple
 
 
 class SuiAnchor:
@@ -51,9 +53,26 @@ class SuiAnchor:
         self.registry_id = registry_id
         self.signer_address = signer_address
 
+        # Keep-alive session so consecutive RPCs reuse one TLS connection.
+        # Our JSON-RPC calls are read-only or build-only, so retrying a POST
+        # on a gateway error is safe.
+        self._http = requests.Session()
+        self._http.mount("https://", HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=8,
+            max_retries=Retry(
+                total=2,
+                backoff_factor=0.3,
+                status_forcelist=(502, 503, 504),
+                allowed_methods=frozenset({"POST"}),
+            ),
+        ))
+
         # Local ledger fallback (when no contract is deployed yet)
         self.local_ledger: List[Dict[str, Any]] = []
-        self._ledger_path = Path("anchor_ledger.json")
+        self._ledger_index: Set[Tuple[str, str]] = set()
+        self._ledger_path = Path("anchor_ledger.jsonl")
+        self._legacy_ledger_path = Path("anchor_ledger.json")
         self._load_local_ledger()
 
     # ── Root Hash Computation ─────────────────────────────
@@ -66,8 +85,23 @@ class SuiAnchor:
         The hash covers the date, total files, category breakdown,
         and any blob IDs — making it tamper-evident.
         """
-        canonical = json.dumps(report_data, sort_keys=True, separators=(",", ":"))
-        return hashlib.sha256(canonical.encode()).hexdigest()
+        return SuiAnchor.compute_root_hash_bytes(SuiAnchor.canonicalize(report_data))
+
+    @staticmethod
+    def canonicalize(report_data: Dict[str, Any]) -> bytes:
+        """
+        Serialize a report to the canonical bytes that get hashed.
+
+        Keep the result around when the same report will be hashed again
+        (e.g. anchor now, verify later) and pass it to
+        :meth:`compute_root_hash_bytes` instead of re-serializing.
+        """
+        return json.dumps(report_data, sort_keys=True, separators=(",", ":")).encode()
+
+    @staticmethod
+    def compute_root_hash_bytes(canonical: bytes) -> str:
+        """SHA-256 root hash of already-canonicalized report bytes."""
+        return hashlib.sha256(canonical).hexdigest()
 
     @staticmethod
     def compute_root_hash_from_actions(actions: List[Dict[str, Any]]) -> str:
@@ -86,7 +120,7 @@ class SuiAnchor:
     # ── Local Ledger (fallback) ───────────────────────────
 
     def anchor_local(self, date: str, root_hash: str, report_summary: Optional[Dict] = None):
-        """Store anchor in local JSON ledger (no blockchain needed)."""
+        """Append anchor to the local JSON-lines ledger (no blockchain needed)."""
         entry = {
             "date": date,
             "root_hash": root_hash,
@@ -94,16 +128,13 @@ class SuiAnchor:
             "source": "local_ledger",
             "report_summary": report_summary,
         }
-        self.local_ledger.append(entry)
-        self._save_local_ledger()
+        self._index_entry(entry)
+        self._append_ledger_entry(entry)
         return entry
 
     def verify_local(self, date: str, root_hash: str) -> bool:
         """Verify a root hash against the local ledger."""
-        for entry in self.local_ledger:
-            if entry["date"] == date and entry["root_hash"] == root_hash:
-                return True
-        return False
+        return (date, root_hash) in self._ledger_index
 
     def get_local_anchors(self, limit: int = 50) -> List[Dict[str, Any]]:
         """Return local ledger entries."""
@@ -112,15 +143,41 @@ class SuiAnchor:
     def _load_local_ledger(self):
         try:
             if self._ledger_path.exists():
-                with open(self._ledger_path) as f:
-                    data = json.load(f)
-                    self.local_ledger = data.get("anchors", [])
+                with open(self._ledger_path, encoding="utf-8", errors="replace") as f:
+                    for lineno, line in enumerate(f, 1):
+                        if not line.strip():
+                            continue
+                        # A crash mid-append tears at most one line; keep the rest
+                        try:
+                            self._index_entry(json.loads(line))
+                        except (ValueError, KeyError, TypeError) as e:
+                            print(f"[WARN] Skipping corrupt ledger line {lineno}: {e}")
+            elif self._legacy_ledger_path.exists():
+                # One-time migration from the old single-document ledger
+                with open(self._legacy_ledger_path) as f:
+                    anchors = json.load(f).get("anchors", [])
+                for entry in anchors:
+                    self._index_entry(entry)
+                    self._append_ledger_entry(entry)
         except Exception:
             self.local_ledger = []
+            self._ledger_index = set()
 
-    def _save_local_ledger(self):
-        with open(self._ledger_path, "w") as f:
-            json.dump({"anchors": self.local_ledger}, f, indent=2)
+    def _index_entry(self, entry: Dict[str, Any]):
+        """Track an entry in memory and in the (date, root_hash) lookup set."""
+        self.local_ledger.append(entry)
+        self._ledger_index.add((entry["date"], entry["root_hash"]))
+
+    def _append_ledger_entry(self, entry: Dict[str, Any]):
+        """Write one ledger entry as a single JSON line (O(1) per anchor)."""
+        line = (json.dumps(entry, separators=(",", ":")) + "\n").encode("utf-8")
+        with open(self._ledger_path, "a+b") as f:
+            # Terminate a torn last line so it doesn't swallow this entry
+            if f.tell() > 0:
+                f.seek(-1, 2)
+                if f.read(1) != b"\n":
+                    line = b"\n" + line
+            f.write(line)
 
     # ── Sui JSON-RPC Calls ────────────────────────────────
 
@@ -132,13 +189,17 @@ class SuiAnchor:
             "method": method,
             "params": params,
         }
-        resp = requests.post(self.rpc_url, json=payload, timeout=30)
+        resp = self._http.post(self.rpc_url, json=payload, timeout=30)
         resp.raise_for_status()
         result = resp.json()
         if "error" in result:
             raise RuntimeError(f"Sui RPC error: {result['error']}")
         return result.get("result", {})
 
+    def close(self):
+        """Release pooled RPC connections."""
+        self._http.close()
+
     def anchor_on_chain(self, date: str, root_hash: str) -> Dict[str, Any]:
         """
         Call the Move contract to anchor a root hash on-chain.
@@ -283,5 +344,5 @@ if __name__ == "__main__":
     print(f"\n📜 Local ledger: {len(entries)} entries")
 
     # Cleanup
-    Path("anchor_ledger.json").unlink(missing_ok=True)
+    Path("anchor_ledger.jsonl").unlink(missing_ok=True)
     print("\n✅ All anchor tests passed!")
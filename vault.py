@@ -12,18 +12,50 @@ Project: Sui Hackathon 2026
 
 import os
 import io
-import json
-import base64
+import time
+import atexit
+import asyncio
 import hashlib
+import binascii
+import mmap
+import struct
 import secrets
+import functools
+import itertools
 import mimetypes
+import threading
+import weakref
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Dict, Any, List, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Dict, Any, List, Tuple, Iterable, Iterator, Union
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 
+try:
+    import pybase64 as base64  # SIMD base64, drop-in for the stdlib API
+except ImportError:
+    import base64
+
+try:
+    import blake3
+    HAS_BLAKE3 = True
+except ImportError:  # optional: content hashes fall back to SHA-256
+    blake3 = None
+    HAS_BLAKE3 = False
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:  # optional: plaintext is uploaded uncompressed
+    zstandard = None
+    HAS_ZSTD = False
+
 
 # ────────────────────────── Crypto helpers ──────────────────
 
@@ -34,38 +66,383 @@ def generate_vault_key() -> bytes:
 
 def key_to_hex(key: bytes) -> str:
     """Encode key as hex string for safe storage / sharing."""
-    return key.hex()
+    return binascii.b2a_hex(key).decode()
 
 
 def hex_to_key(hex_str: str) -> bytes:
     """Decode a hex-encoded AES key."""
-    return bytes.fromhex(hex_str)
+    return binascii.a2b_hex(hex_str)
+
+
+@functools.lru_cache(maxsize=32)
+def _aesgcm_for(key: bytes) -> AESGCM:
+    """
+    Return a shared AESGCM instance for *key*.
+
+    A folder upload encrypts every file under the same key; caching the
+    cipher object avoids re-validating and re-wrapping the key per file.
+    AESGCM is stateless between calls, so sharing it across threads is safe.
+    """
+    return AESGCM(key)
+
 
+@functools.lru_cache(maxsize=32)
+def _aes_for(key: bytes) -> algorithms.AES:
+    """
+    Return a shared AES algorithm object for the streaming Cipher paths.
 
-def encrypt_bytes(data: bytes, key: bytes) -> Tuple[bytes, bytes]:
+    Companion to :func:`_aesgcm_for` for code that needs incremental GCM
+    (``Cipher(...).encryptor()``): the key is validated and wrapped once per
+    key rather than once per file.  The object is immutable, so it can be
+    shared by store_folder's worker threads.
+    """
+    return algorithms.AES(key)
+
+
+def encrypt_bytes(
+    data: bytes,
+    key: bytes,
+    out: Optional[bytearray] = None,
+    nonce: Optional[bytes] = None,
+) -> Tuple[bytes, Union[bytes, memoryview]]:
     """
     Encrypt *data* with AES-256-GCM.
 
-    Returns (nonce, ciphertext).  Nonce is 12 bytes.
+    Returns (nonce, ciphertext).  Nonce is 12 bytes, random unless the
+    caller supplies one (it must never repeat under the same key).  If *out* is given
+    (at least ``len(data) + 16`` bytes) the ciphertext and tag are written
+    into it and returned as a memoryview over *out*, saving one copy.
     """
-    aesgcm = AESGCM(key)
-    nonce = os.urandom(12)
-    ciphertext = aesgcm.encrypt(nonce, data, None)
-    return nonce, ciphertext
+    if nonce is None:
+        nonce = os.urandom(12)
+    if out is None:
+        return nonce, _aesgcm_for(key).encrypt(nonce, data, None)
+
+    n = len(data)
+    if len(out) < n + _GCM_TAG_LEN:
+        raise ValueError(f"Output buffer too small: need {n + _GCM_TAG_LEN} bytes")
+    encryptor = Cipher(_aes_for(key), modes.GCM(nonce)).encryptor()
+    view = memoryview(out)
+    written = encryptor.update_into(data, view)
+    encryptor.finalize()
+    view[written:written + _GCM_TAG_LEN] = encryptor.tag
+    return nonce, view[:written + _GCM_TAG_LEN]
 
 
 def decrypt_bytes(nonce: bytes, ciphertext: bytes, key: bytes) -> bytes:
     """Decrypt AES-256-GCM ciphertext."""
-    aesgcm = AESGCM(key)
+    aesgcm = _aesgcm_for(key)
     return aesgcm.decrypt(nonce, ciphertext, None)
 
 
+# ────────────────────────── Share tokens ───────────────────
+#
+# v1 tokens are packed binary, base64url-encoded without padding:
+#
+#   MAGIC || flags (1B) || nonce_len (1B) || blob_len (1B) || name_len (2B BE)
+#         || key (32B) || nonce || blob || file_name (UTF-8)
+#
+# Walrus blob ids are unpadded base64url of 32 raw bytes; those are stored
+# raw (flag bit 0), anything else as UTF-8.  Tokens that don't start with
+# MAGIC are the original JSON {"b","k","n","f"} format.
+
+_TOKEN_MAGIC = b"DV1"
+_TOKEN_RAW_BLOB = 0x01
+_TOKEN_HEAD = struct.Struct("!3sBBBH32s")
+
+
+def _b64url_raw(text: str) -> Optional[bytes]:
+    """Raw bytes of an unpadded base64url string, or None if it doesn't round-trip."""
+    try:
+        raw = base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+    except (ValueError, binascii.Error):
+        return None
+    if base64.urlsafe_b64encode(raw).rstrip(b"=").decode() != text:
+        return None
+    return raw
+
+
+# ────────────────────────── Segmented streaming ─────────────
+#
+# Large files are encrypted as independent AES-256-GCM segments so they can
+# be read, encrypted and uploaded through a constant-size window:
+#
+#   blob    = MAGIC || segment_size (4B BE) || seg_0 || seg_1 || ... || seg_n
+#   seg_i   = AES-GCM(key, nonce_prefix || i (4B BE), chunk_i, aad_i)
+#   aad_i   = header || 0x01 if seg_i is the last segment else 0x00
+#
+# Authenticating the header and a final-segment flag means truncated,
+# reordered or re-framed blobs fail to decrypt.  Segmented blobs are
+# identified by their 8-byte nonce prefix (vs. the 12-byte single-shot nonce),
+# so share tokens and the download API need no extra field.
+#
+# A ``DVZ1`` magic marks a blob whose plaintext stream was zstd-compressed
+# before encryption.  The flag lives in the authenticated header, so
+# decompression is decided by the blob itself rather than the manifest.
+
+SEGMENT_SIZE = 1 << 20                  # 1 MiB plaintext per segment
+STREAM_THRESHOLD = 4 * SEGMENT_SIZE     # files at/above this size are streamed
+SEGMENT_NONCE_PREFIX_LEN = 8
+_SEGMENT_MAGIC = b"DVS1"
+_SEGMENT_MAGIC_ZSTD = b"DVZ1"
+_GCM_TAG_LEN = 16
+_NONCE_MASK = (1 << 96) - 1
+ZSTD_LEVEL = 3
+
+# Already-compressed formats gain nothing from another zstd pass
+_INCOMPRESSIBLE_EXTS = frozenset({
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".7z", ".rar", ".zst",
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".heic",
+    ".mp3", ".aac", ".ogg", ".flac", ".m4a",
+    ".mp4", ".mkv", ".mov", ".avi", ".webm",
+    ".docx", ".xlsx", ".pptx",
+})
+
+
+def _segment_header(segment_size: int, compressed: bool = False) -> bytes:
+    magic = _SEGMENT_MAGIC_ZSTD if compressed else _SEGMENT_MAGIC
+    return magic + segment_size.to_bytes(4, "big")
+
+
+def _segment_nonce(nonce_prefix: bytes, index: int) -> bytes:
+    return nonce_prefix + index.to_bytes(4, "big")
+
+
+def is_segmented_nonce(nonce: bytes) -> bool:
+    """True if *nonce* is the 8-byte prefix of a segmented blob."""
+    return len(nonce) == SEGMENT_NONCE_PREFIX_LEN
+
+
+def is_compressible(file_path: Path) -> bool:
+    """True if zstd is available and *file_path* is not an already-compressed format."""
+    return HAS_ZSTD and Path(file_path).suffix.lower() not in _INCOMPRESSIBLE_EXTS
+
+
+def zstd_segments(chunks: Iterable[bytes], segment_size: int = SEGMENT_SIZE) -> Iterator[bytes]:
+    """
+    Compress a plaintext stream with zstd and re-cut the output into
+    *segment_size* pieces, as ``encrypt_segments`` expects.
+    """
+    cobj = zstandard.ZstdCompressor(level=ZSTD_LEVEL, threads=-1).compressobj()
+    buf = bytearray()
+    for chunk in chunks:
+        buf += cobj.compress(chunk)
+        while len(buf) >= segment_size:
+            yield bytes(buf[:segment_size])
+            del buf[:segment_size]
+    buf += cobj.flush()
+    while len(buf) > segment_size:
+        yield bytes(buf[:segment_size])
+        del buf[:segment_size]
+    yield bytes(buf)
+
+
+def encrypt_segments(
+    chunks: Iterable[bytes],
+    key: bytes,
+    nonce_prefix: bytes,
+    segment_size: int = SEGMENT_SIZE,
+    compressed: bool = False,
+) -> Iterator[bytes]:
+    """
+    Encrypt a stream of plaintext chunks into the segmented blob format.
+
+    Every chunk except the last must be exactly *segment_size* bytes.
+    Set *compressed* when the chunks are zstd output (see ``zstd_segments``).
+    Yields the header followed by one ciphertext+tag per chunk.
+    """
+    aesgcm = _aesgcm_for(key)
+    header = _segment_header(segment_size, compressed)
+    yield header
+
+    # Look one chunk ahead so the last segment can be flagged as final
+    it = iter(chunks)
+    current = next(it, b"")
+    index = 0
+    for upcoming in it:
+        yield aesgcm.encrypt(_segment_nonce(nonce_prefix, index), current, header + b"\x00")
+        current = upcoming
+        index += 1
+    yield aesgcm.encrypt(_segment_nonce(nonce_prefix, index), current, header + b"\x01")
+
+
+def decrypt_segments(
+    blob_chunks: Iterable[bytes],
+    key: bytes,
+    nonce_prefix: bytes,
+) -> Iterator[bytes]:
+    """
+    Decrypt a segmented blob delivered as arbitrary-sized byte chunks.
+
+    Yields one plaintext chunk per segment, transparently decompressing
+    zstd blobs.  Raises ``ValueError`` for a malformed header and
+    ``InvalidTag`` if any segment fails authentication.
+    """
+    aesgcm = _aesgcm_for(key)
+    buf = bytearray()
+    header = None
+    dobj = None
+    seg_len = 0
+    index = 0
+
+    for chunk in blob_chunks:
+        buf += chunk
+        if header is None:
+            if len(buf) < 8:
+                continue
+            header = bytes(buf[:8])
+            if header[:4] == _SEGMENT_MAGIC_ZSTD:
+                if not HAS_ZSTD:
+                    raise RuntimeError("zstandard is required to decrypt this blob")
+                dobj = zstandard.ZstdDecompressor().decompressobj()
+            elif header[:4] != _SEGMENT_MAGIC:
+                raise ValueError("Not a segmented vault blob")
+            seg_len = int.from_bytes(header[4:], "big") + _GCM_TAG_LEN
+            del buf[:8]
+        # Only decrypt a full segment once more data follows it — the last
+        # segment is handled after the stream ends.
+        while len(buf) > seg_len:
+            plain = aesgcm.decrypt(
+                _segment_nonce(nonce_prefix, index), bytes(buf[:seg_len]), header + b"\x00"
+            )
+            yield dobj.decompress(plain) if dobj else plain
+            del buf[:seg_len]
+            index += 1
+
+    if header is None:
+        raise ValueError("Truncated segmented vault blob")
+    plain = aesgcm.decrypt(_segment_nonce(nonce_prefix, index), bytes(buf), header + b"\x01")
+    yield dobj.decompress(plain) if dobj else plain
+
+
 def encrypt_file(file_path: Path, key: bytes) -> Tuple[bytes, bytes]:
     """Read a file and return (nonce, ciphertext)."""
     data = file_path.read_bytes()
     return encrypt_bytes(data, key)
 
 
+def _mmap_sequential(f) -> mmap.mmap:
+    """Map *f* read-only and hint the kernel to read ahead aggressively."""
+    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):  # not on Windows
+        mm.madvise(mmap.MADV_SEQUENTIAL)
+    return mm
+
+
+def new_content_hasher(algo: str):
+    """Return a fresh incremental hasher for *algo* ("blake3" or "sha256")."""
+    if algo == "blake3":
+        if not HAS_BLAKE3:
+            raise ImportError("blake3 is not installed (pip install blake3)")
+        return blake3.blake3(max_threads=blake3.blake3.AUTO)
+    if algo == "sha256":
+        return hashlib.sha256()
+    raise ValueError(f"Unsupported hash algorithm: {algo!r}")
+
+
+class _KnownHash:
+    """Hasher stand-in for when the content hash was already computed."""
+
+    def __init__(self, hex_digest: str):
+        self._hex = hex_digest
+
+    def update(self, data):
+        pass
+
+    def hexdigest(self) -> str:
+        return self._hex
+
+
+def hash_file(file_path: Path, algo: str, chunk_size: int = 1 << 20) -> str:
+    """Hash a file's contents with *algo* without reading it into memory."""
+    hasher = new_content_hasher(algo)
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size:
+            with _mmap_sequential(f) as mm, memoryview(mm) as mv:
+                for offset in range(0, len(mm), chunk_size):
+                    with mv[offset:offset + chunk_size] as chunk:
+                        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def encrypt_file_hashed(
+    file_path: Path,
+    key: bytes,
+    chunk_size: int = 256 * 1024,
+    hasher=None,
+    nonce: Optional[bytes] = None,
+) -> Tuple[bytes, memoryview, str]:
+    """
+    Encrypt a file and hash its plaintext in a single pass.
+
+    The file is memory-mapped and walked in *chunk_size* windows; each
+    window is hashed and encrypted straight into a preallocated output
+    buffer while still hot in cache, so the plaintext is never copied
+    into Python at all.  The output is byte-for-byte what
+    :func:`encrypt_bytes` produces (ciphertext || 16-byte tag).
+    *hasher* defaults to SHA-256; *nonce* to 12 random bytes.
+
+    Returns (nonce, ciphertext_view, hash_hex).
+    """
+    if nonce is None:
+        nonce = os.urandom(12)
+    encryptor = Cipher(_aes_for(key), modes.GCM(nonce)).encryptor()
+    if hasher is None:
+        hasher = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        # Sized from the file at open time; bytes appended later are ignored
+        size = os.fstat(f.fileno()).st_size
+        out = memoryview(bytearray(size + _GCM_TAG_LEN))
+        pos = 0
+        if size:  # mmap refuses zero-length files
+            with _mmap_sequential(f) as mm, memoryview(mm) as mv:
+                for offset in range(0, min(size, len(mm)), chunk_size):
+                    with mv[offset:min(offset + chunk_size, size)] as chunk:
+                        hasher.update(chunk)
+                        pos += encryptor.update_into(chunk, out[pos:])
+    encryptor.finalize()
+    out[pos:pos + _GCM_TAG_LEN] = encryptor.tag
+    return nonce, out[:pos + _GCM_TAG_LEN], hasher.hexdigest()
+
+
+def decrypt_stream_into(
+    chunks: Iterable[bytes],
+    key: bytes,
+    nonce: bytes,
+    out: io.BufferedIOBase,
+) -> int:
+    """
+    Decrypt single-shot AES-256-GCM ciphertext arriving in chunks into *out*.
+
+    The trailing 16-byte tag is held back and checked by
+    ``finalize_with_tag`` once the stream ends, so *out* must be treated as
+    untrusted until this returns (it raises ``InvalidTag`` otherwise).
+    Returns the number of plaintext bytes written.
+    """
+    decryptor = Cipher(_aes_for(key), modes.GCM(nonce)).decryptor()
+    pending = bytearray()   # ciphertext not yet decrypted (always keeps the tag)
+    buf = bytearray()       # plaintext output buffer, reused across chunks
+    written = 0
+
+    for chunk in chunks:
+        pending += chunk
+        n = len(pending) - _GCM_TAG_LEN
+        if n <= 0:
+            continue
+        if len(buf) < n + 15:
+            buf = bytearray(n + 15)  # update_into needs block_size - 1 slack
+        with memoryview(pending)[:n] as view:
+            produced = decryptor.update_into(view, buf)
+        out.write(memoryview(buf)[:produced])
+        written += produced
+        del pending[:n]
+
+    if len(pending) != _GCM_TAG_LEN:
+        raise ValueError("Truncated ciphertext")
+    decryptor.finalize_with_tag(bytes(pending))
+    return written
+
+
 def decrypt_to_file(nonce: bytes, ciphertext: bytes, key: bytes, output_path: Path):
     """Decrypt ciphertext and write the plaintext to *output_path*."""
     plaintext = decrypt_bytes(nonce, ciphertext, key)
@@ -76,6 +453,20 @@ def decrypt_to_file(nonce: bytes, ciphertext: bytes, key: bytes, output_path: Pa
 
 # ────────────────────────── Walrus Vault ───────────────────
 
+# Vaults with an on-disk dedup cache, saved once at interpreter exit.
+# Weak references, so registering doesn't keep a vault alive.
+_vaults_to_save: "weakref.WeakSet[DeepurgeVault]" = weakref.WeakSet()
+
+
+@atexit.register
+def _save_dedup_caches():
+    for vault in list(_vaults_to_save):
+        try:
+            vault.save_dedup_cache()
+        except OSError as e:
+            print(f"[WARN] Could not save vault cache {vault._dedup_path}: {e}")
+
+
 class DeepurgeVault:
     """
     Encrypted file vault backed by Walrus decentralized storage.
@@ -90,16 +481,138 @@ class DeepurgeVault:
     TESTNET_AGGREGATOR = "https://aggregator.walrus-testnet.walrus.space"
     TESTNET_PUBLISHER = "https://publisher.walrus-testnet.walrus.space"
 
+    DEFAULT_DEDUP_CACHE = Path.home() / ".deepurge" / "vault_cache.json"
+    # Conservative epoch length used to expire dedup entries (testnet: 1 day)
+    EPOCH_SECONDS = 24 * 3600
+
     def __init__(
         self,
         aggregator_url: Optional[str] = None,
         publisher_url: Optional[str] = None,
         epochs: int = 10,
+        hash_algo: Optional[str] = None,
+        dedup_cache: Optional[Path] = DEFAULT_DEDUP_CACHE,
     ):
         self.aggregator_url = aggregator_url or self.TESTNET_AGGREGATOR
         self.publisher_url = publisher_url or self.TESTNET_PUBLISHER
         self.epochs = epochs
 
+        # Plaintext content hash: BLAKE3 when available, SHA-256 otherwise.
+        # Pass hash_algo="sha256" explicitly where auditors require it.
+        self.hash_algo = hash_algo or ("blake3" if HAS_BLAKE3 else "sha256")
+        new_content_hasher(self.hash_algo)  # fail fast on a bad/missing algo
+
+        # GCM nonces only need to be unique per key, not unpredictable:
+        # a randomly seeded 96-bit counter (as in TLS 1.3 / QUIC) avoids a
+        # getrandom() syscall per file.  itertools.count is thread-safe
+        # under the GIL, so store_folder's workers can share it.
+        self._nonce_counter = itertools.count(secrets.randbits(96))
+
+        # Content dedup: "<algo>:<hash>" → previously uploaded blob, so
+        # unchanged files skip both encryption and upload.  Persisted to
+        # *dedup_cache* (None keeps it in memory only).
+        self._dedup_path = Path(dedup_cache) if dedup_cache else None
+        self._dedup_cache: Dict[str, Dict[str, Any]] = self._load_dedup_cache()
+        self._dedup_lock = threading.Lock()
+        self._dedup_dirty = False
+        if self._dedup_path:
+            _vaults_to_save.add(self)
+
+        # Pooled keep-alive session: store_folder issues many PUTs to the
+        # same publisher, and each fresh connection costs a TLS handshake.
+        self._session = requests.Session()
+        self._session.mount("https://", HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=32,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(502, 503, 504)),
+        ))
+        # Uploads may stream their body from a generator, which can't be
+        # replayed — only retry when the connection itself failed.
+        self._session.mount(self.publisher_url, HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=32,
+            max_retries=Retry(total=3, connect=3, read=0, status=0, other=0, backoff_factor=0.3),
+        ))
+
+    def _next_nonce(self) -> bytes:
+        """Return the next 12-byte single-shot GCM nonce."""
+        return (next(self._nonce_counter) & _NONCE_MASK).to_bytes(12, "big")
+
+    def close(self):
+        """Persist the dedup cache and release pooled HTTP connections."""
+        self.save_dedup_cache()
+        self._session.close()
+
+    def __del__(self):
+        # Registered only weakly for exit, so save here if never closed
+        try:
+            self.save_dedup_cache()
+        except Exception:
+            pass
+
+    def __enter__(self) -> "DeepurgeVault":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ── Dedup cache ───────────────────────────────────────
+
+    def _load_dedup_cache(self) -> Dict[str, Dict[str, Any]]:
+        if not self._dedup_path or not self._dedup_path.exists():
+            return {}
+        try:
+            return orjson.loads(self._dedup_path.read_bytes())
+        except (OSError, orjson.JSONDecodeError) as e:
+            print(f"[WARN] Ignoring unreadable vault cache {self._dedup_path}: {e}")
+            return {}
+
+    def save_dedup_cache(self):
+        """Atomically write the dedup cache to disk (no-op if unchanged)."""
+        if not self._dedup_path or not self._dedup_dirty:
+            return
+        with self._dedup_lock:
+            data = orjson.dumps(self._dedup_cache)
+            self._dedup_dirty = False
+        self._dedup_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self._dedup_path.with_suffix(".tmp")
+        # The cache holds AES keys — keep it private to the user
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self._dedup_path)
+
+    def _dedup_lookup(
+        self, content_hash: str, key: Optional[bytes], epochs: int
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Return a cached upload of *content_hash*, if it stays stored for at
+        least *epochs* more epochs and is encrypted under *key* (any key
+        when *key* is None).
+        """
+        entry = self._dedup_cache.get(f"{self.hash_algo}:{content_hash}")
+        if entry is None or entry["expires_at"] < self._epochs_end(epochs):
+            return None
+        if key is not None and entry["key_hex"] != key_to_hex(key):
+            return None
+        return entry
+
+    def _epochs_end(self, epochs: int) -> float:
+        """
+        End of storage for a blob stored now for *epochs* epochs.
+
+        Storage is counted in whole epochs, so the end is aligned to an
+        epoch boundary: a re-store within the same epoch asks for exactly
+        what the first store paid for, and can reuse it.
+        """
+        return (time.time() // self.EPOCH_SECONDS + epochs) * self.EPOCH_SECONDS
+
+    def _dedup_remember(self, content_hash: str, blob: Dict[str, Any], epochs: int):
+        entry = {**blob, "expires_at": self._epochs_end(epochs)}
+        with self._dedup_lock:
+            self._dedup_cache[f"{self.hash_algo}:{content_hash}"] = entry
+            self._dedup_dirty = True
+
     # ── Upload ────────────────────────────────────────────
 
     def store(
@@ -107,67 +620,262 @@ class DeepurgeVault:
         file_path: Path,
         key: Optional[bytes] = None,
         epochs: Optional[int] = None,
+        compress: bool = True,
+        dedup: bool = True,
     ) -> Dict[str, Any]:
         """
         Encrypt a file and upload to Walrus.
 
+        With *dedup*, a file whose content was already uploaded (and whose
+        blob has not expired) reuses that blob instead of being encrypted
+        and uploaded again.  If *key* is given, only blobs encrypted under
+        that key are reused.
+
+        With *compress* (and ``zstandard`` installed) the plaintext is
+        zstd-compressed before encryption; already-compressed formats are
+        skipped.  Compressed files always use the segmented blob format.
+
         Returns a *vault manifest* dict:
         {
             "blob_id":    "<walrus blob id>",
             "key_hex":    "<hex-encoded AES key>",
-            "nonce_hex":  "<hex-encoded 12-byte nonce>",
+            "nonce_hex":  "<hex-encoded 12-byte nonce, or 8-byte prefix if segmented>",
             "file_name":  "original.pdf",
             "file_size":  12345,
             "mime_type":  "application/pdf",
-            "sha256":     "<sha256 of plaintext>",
+            "content_hash": "<hash of plaintext>",
+            "hash_algo":  "blake3" | "sha256",
+            "sha256":     "<same as content_hash; only when hash_algo is sha256>",
             "encrypted_size": 12361,
+            "compression": "zstd" | None,
+            "compressed_size": 4096,   # only when compressed
             "uploaded_at": "...",
-            "walrus_url": "..."
+            "walrus_url": "...",
+            "deduplicated": True        # only when an earlier blob was reused
         }
         """
         file_path = Path(file_path)
         if not file_path.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
 
-        plaintext = file_path.read_bytes()
-        plaintext_hash = hashlib.sha256(plaintext).hexdigest()
+        file_size = file_path.stat().st_size
         mime = mimetypes.guess_type(str(file_path))[0] or "application/octet-stream"
 
+        epochs = epochs or self.epochs
+        cached = None
+        known_hash = None
+        # An empty cache can't hit — skip the extra read and let the
+        # encrypt pass compute the hash as usual
+        if dedup and self._dedup_cache:
+            known_hash = hash_file(file_path, self.hash_algo)
+            cached = self._dedup_lookup(known_hash, key, epochs)
+
+        if cached is not None:
+            blob, plaintext_hash = cached, known_hash
+        else:
+            blob, plaintext_hash = self._encrypt_and_upload(
+                file_path, key, epochs, compress, known_hash)
+            if dedup:
+                self._dedup_remember(plaintext_hash, blob, epochs)
+
+        manifest = {
+            "blob_id": blob["blob_id"],
+            "key_hex": blob["key_hex"],
+            "nonce_hex": blob["nonce_hex"],
+            "file_name": file_path.name,
+            "file_size": file_size,
+            "mime_type": mime,
+            "content_hash": plaintext_hash,
+            "hash_algo": self.hash_algo,
+            "encrypted_size": blob["encrypted_size"],
+            "compression": blob["compression"],
+            "uploaded_at": blob["uploaded_at"],
+            "walrus_url": f"{self.aggregator_url}/v1/blobs/{blob['blob_id']}",
+        }
+        if blob.get("compressed_size") is not None:
+            manifest["compressed_size"] = blob["compressed_size"]
+        if self.hash_algo == "sha256":
+            manifest["sha256"] = plaintext_hash
+        if cached is not None:
+            manifest["deduplicated"] = True
+        return manifest
+
+    def _encrypt_and_upload(
+        self,
+        file_path: Path,
+        key: Optional[bytes],
+        epochs: Optional[int],
+        compress: bool,
+        content_hash: Optional[str] = None,
+    ) -> Tuple[Dict[str, Any], str]:
+        """
+        Encrypt and upload one file; return (blob fields, content_hash).
+
+        Pass *content_hash* when the plaintext was already hashed so the
+        encrypt pass doesn't hash it again.
+        """
+        hasher = _KnownHash(content_hash) if content_hash else new_content_hasher(self.hash_algo)
         if key is None:
             key = generate_vault_key()
 
-        nonce, ciphertext = encrypt_bytes(plaintext, key)
+        compress = compress and is_compressible(file_path)
+        compressed_size = None
+
+        if compress or file_path.stat().st_size >= STREAM_THRESHOLD:
+            nonce, plaintext_hash, blob_id, encrypted_size, compressed_size = \
+                self._store_segmented(file_path, key, epochs, compress, hasher)
+        else:
+            nonce, ciphertext, plaintext_hash = encrypt_file_hashed(
+                file_path, key,
+                hasher=hasher,
+                nonce=self._next_nonce(),
+            )
 
-        # Upload ciphertext to Walrus
-        blob_id = self._upload_raw(ciphertext, epochs)
+            # Upload ciphertext to Walrus
+            blob_id = self._upload_raw(ciphertext, epochs)
+            encrypted_size = len(ciphertext)
 
         if blob_id is None:
             raise RuntimeError("Walrus upload failed")
 
-        manifest = {
+        blob = {
             "blob_id": blob_id,
             "key_hex": key_to_hex(key),
-            "nonce_hex": nonce.hex(),
-            "file_name": file_path.name,
-            "file_size": len(plaintext),
-            "mime_type": mime,
-            "sha256": plaintext_hash,
-            "encrypted_size": len(ciphertext),
+            "nonce_hex": binascii.b2a_hex(nonce).decode(),
+            "encrypted_size": encrypted_size,
+            "compression": "zstd" if compress else None,
             "uploaded_at": datetime.utcnow().isoformat() + "Z",
-            "walrus_url": f"{self.aggregator_url}/v1/blobs/{blob_id}",
         }
-        return manifest
+        if compress:
+            blob["compressed_size"] = compressed_size
+        return blob, plaintext_hash
+
+    def _store_segmented(
+        self,
+        file_path: Path,
+        key: bytes,
+        epochs: Optional[int],
+        compress: bool = False,
+        hasher=None,
+    ) -> Tuple[bytes, str, Optional[str], int, Optional[int]]:
+        """
+        Hash, (optionally) compress, encrypt and upload a file one segment
+        at a time.
+
+        The file is memory-mapped and fed to Walrus as a chunked request
+        body, so neither the plaintext nor the ciphertext is ever held in
+        memory whole.  Returns (nonce_prefix, content_hash_hex, blob_id,
+        encrypted_size, compressed_size).
+        """
+        nonce_prefix = os.urandom(SEGMENT_NONCE_PREFIX_LEN)
+        if hasher is None:
+            hasher = new_content_hasher(self.hash_algo)
+        sizes = {"encrypted": 0, "compressed": 0}
+
+        with open(file_path, "rb") as f:
+            # mmap refuses zero-length files; those just produce one empty segment
+            mm = _mmap_sequential(f) if os.fstat(f.fileno()).st_size else None
+            try:
+                def windows() -> Iterator[bytes]:
+                    if mm is None:
+                        return
+                    for offset in range(0, len(mm), SEGMENT_SIZE):
+                        chunk = mm[offset:offset + SEGMENT_SIZE]
+                        hasher.update(chunk)
+                        yield chunk
+
+                def counted(chunks: Iterable[bytes], field: str) -> Iterator[bytes]:
+                    for chunk in chunks:
+                        sizes[field] += len(chunk)
+                        yield chunk
+
+                chunks = windows()
+                if compress:
+                    chunks = counted(zstd_segments(chunks), "compressed")
+                blob = encrypt_segments(chunks, key, nonce_prefix, compressed=compress)
+                blob_id = self._upload_raw(counted(blob, "encrypted"), epochs)
+            finally:
+                if mm is not None:
+                    mm.close()
+
+        return (nonce_prefix, hasher.hexdigest(), blob_id,
+                sizes["encrypted"], sizes["compressed"] if compress else None)
 
     def store_folder(
         self,
         folder_path: Path,
         key: Optional[bytes] = None,
+        max_workers: int = 16,
     ) -> Dict[str, Any]:
         """
         Encrypt and upload every file in *folder_path* with the same key.
 
+        Files are stored concurrently on *max_workers* threads — each upload
+        mostly waits on the network, and both AES-GCM and socket I/O release
+        the GIL.  Manifests and the hash chain still follow sorted path order.
+
         Returns a *folder manifest* containing a list of per-file manifests
-        plus a root hash (SHA-256 of all individual hashes concatenated).
+        plus a root hash (``hash_algo`` over all individual hashes concatenated).
+        """
+        folder_path, key, files = self._prepare_folder(folder_path, key)
+        results: List[Any] = [None] * len(files)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self.store, abs_path, key=key): i
+                for i, (_, abs_path) in enumerate(files)
+            }
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    results[i] = e
+
+        return self._finish_folder(folder_path, key, files, results)
+
+    async def store_folder_async(
+        self,
+        folder_path: Path,
+        key: Optional[bytes] = None,
+        concurrency: int = 32,
+    ) -> Dict[str, Any]:
+        """
+        Asyncio sibling of :meth:`store_folder` for callers already running
+        an event loop.
+
+        Up to *concurrency* files are encrypted and uploaded at once on a
+        dedicated executor, so the loop itself never blocks on AES or HTTP.
+        Returns the same folder manifest as :meth:`store_folder`.
+        """
+        folder_path, key, files = self._prepare_folder(folder_path, key)
+        loop = asyncio.get_running_loop()
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = await asyncio.gather(
+                *(
+                    loop.run_in_executor(executor, functools.partial(self.store, abs_path, key=key))
+                    for _, abs_path in files
+                ),
+                return_exceptions=True,
+            )
+            return await loop.run_in_executor(
+                executor, self._finish_folder, folder_path, key, files, results
+            )
+
+    def _prepare_folder(
+        self,
+        folder_path: Path,
+        key: Optional[bytes],
+    ) -> Tuple[Path, bytes, List[Tuple[str, str]]]:
+        """
+        Validate *folder_path*, pick the key and list its files.
+
+        Files come back as ``(relative_path, absolute_path)`` string pairs
+        sorted by relative path.  The tree is walked with ``os.scandir`` so
+        file/dir checks use the cached directory-entry type instead of one
+        ``stat`` per path, and no ``Path`` objects are built per file.
+        Symlinked directories are not followed.
         """
         folder_path = Path(folder_path)
         if not folder_path.is_dir():
@@ -176,22 +884,53 @@ class DeepurgeVault:
         if key is None:
             key = generate_vault_key()
 
-        manifests: List[Dict[str, Any]] = []
-        hash_chain = hashlib.sha256()
-
-        for fp in sorted(folder_path.rglob("*")):
-            if fp.is_file():
-                try:
-                    m = self.store(fp, key=key)
-                    m["relative_path"] = str(fp.relative_to(folder_path))
-                    manifests.append(m)
-                    hash_chain.update(m["sha256"].encode())
-                except Exception as e:
-                    manifests.append({
-                        "file_name": fp.name,
-                        "relative_path": str(fp.relative_to(folder_path)),
-                        "error": str(e),
-                    })
+        prefix_len = len(os.path.join(str(folder_path), ""))
+        files: List[Tuple[str, str]] = []
+        pending = [str(folder_path)]
+        while pending:
+            directory = pending.pop()
+            try:
+                it = os.scandir(directory)
+            except PermissionError:
+                # Like rglob: an unreadable subtree is skipped, not fatal
+                print(f"[WARN] Skipping unreadable directory: {directory}")
+                continue
+            with it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file():
+                        files.append((entry.path[prefix_len:], entry.path))
+        files.sort()
+        return folder_path, key, files
+
+    def _finish_folder(
+        self,
+        folder_path: Path,
+        key: bytes,
+        files: List[Tuple[str, str]],
+        results: List[Any],
+    ) -> Dict[str, Any]:
+        """Build the folder manifest from per-file results and upload it."""
+        # Assemble in sorted order so the root hash stays deterministic
+        manifests: List[Optional[Dict[str, Any]]] = [None] * len(files)
+        digests: List[bytes] = []
+
+        for i, ((relative_path, abs_path), result) in enumerate(zip(files, results)):
+            if isinstance(result, BaseException):
+                manifests[i] = {
+                    "file_name": os.path.basename(abs_path),
+                    "relative_path": relative_path,
+                    "error": str(result),
+                }
+                continue
+            result["relative_path"] = relative_path
+            manifests[i] = result
+            digests.append(binascii.a2b_hex(result["content_hash"]))
+
+        # Root hash = H(raw digest_0 || raw digest_1 || ...), hashed in one call
+        hash_chain = new_content_hasher(self.hash_algo)
+        hash_chain.update(b"".join(digests))
 
         folder_manifest = {
             "type": "vault_folder",
@@ -199,6 +938,7 @@ class DeepurgeVault:
             "key_hex": key_to_hex(key),
             "file_count": len(manifests),
             "root_hash": hash_chain.hexdigest(),
+            "hash_algo": self.hash_algo,
             "files": manifests,
             "uploaded_at": datetime.utcnow().isoformat() + "Z",
         }
@@ -209,7 +949,7 @@ class DeepurgeVault:
             if "key_hex" in f:
                 f["key_hex"] = "[REDACTED]"
         manifest_blob_id = self._upload_raw(
-            json.dumps(safe_manifest, indent=2).encode()
+            orjson.dumps(safe_manifest, option=orjson.OPT_INDENT_2)
         )
         folder_manifest["manifest_blob_id"] = manifest_blob_id
 
@@ -229,7 +969,9 @@ class DeepurgeVault:
             raise RuntimeError(f"Failed to download blob {blob_id}")
 
         key = hex_to_key(key_hex)
-        nonce = bytes.fromhex(nonce_hex)
+        nonce = binascii.a2b_hex(nonce_hex)
+        if is_segmented_nonce(nonce):
+            return b"".join(decrypt_segments((ciphertext,), key, nonce))
         return decrypt_bytes(nonce, ciphertext, key)
 
     def retrieve_to_file(
@@ -239,11 +981,31 @@ class DeepurgeVault:
         nonce_hex: str,
         output_path: Path,
     ) -> Path:
-        """Download, decrypt, and save to disk."""
-        plaintext = self.retrieve(blob_id, key_hex, nonce_hex)
+        """
+        Download, decrypt, and save to disk.
+
+        The blob is streamed from Walrus and decrypted straight into a
+        ``.part`` file, which only replaces *output_path* once the GCM tag(s)
+        verify — the full ciphertext or plaintext is never held in memory.
+        """
+        key = hex_to_key(key_hex)
+        nonce = binascii.a2b_hex(nonce_hex)
         output_path = Path(output_path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        output_path.write_bytes(plaintext)
+        tmp_path = output_path.with_name(output_path.name + ".part")
+
+        try:
+            with open(tmp_path, "wb") as out:
+                chunks = self._download_stream(blob_id)
+                if is_segmented_nonce(nonce):
+                    for plaintext in decrypt_segments(chunks, key, nonce):
+                        out.write(plaintext)
+                else:
+                    decrypt_stream_into(chunks, key, nonce, out)
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
         return output_path
 
     # ── Shareable Links ───────────────────────────────────
@@ -256,24 +1018,55 @@ class DeepurgeVault:
         The token contains everything needed to download & decrypt,
         so anyone with the token can access the file — *no central server*.
         """
-        payload = json.dumps({
-            "b": blob_id,
-            "k": key_hex,
-            "n": nonce_hex,
-            "f": file_name,
-        }, separators=(",", ":"))
-        return base64.urlsafe_b64encode(payload.encode()).decode()
+        key = hex_to_key(key_hex)
+        nonce = binascii.a2b_hex(nonce_hex)
+        blob = _b64url_raw(blob_id)
+        flags = _TOKEN_RAW_BLOB if blob is not None else 0
+        if blob is None:
+            blob = blob_id.encode()
+        name = file_name.encode()
+
+        if len(key) != 32 or len(blob) > 0xFF or len(nonce) > 0xFF or len(name) > 0xFFFF:
+            # Doesn't fit the packed layout — fall back to the v0 JSON token
+            payload = orjson.dumps({"b": blob_id, "k": key_hex, "n": nonce_hex, "f": file_name})
+        else:
+            payload = b"".join((
+                _TOKEN_HEAD.pack(_TOKEN_MAGIC, flags, len(nonce), len(blob), len(name), key),
+                nonce, blob, name,
+            ))
+        return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
 
     @staticmethod
     def parse_share_token(token: str) -> Dict[str, str]:
-        """Decode a share token back into its components."""
-        payload = base64.urlsafe_b64decode(token.encode()).decode()
-        data = json.loads(payload)
+        """Decode a share token (packed v1 or legacy JSON v0) into its components."""
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        if not raw.startswith(_TOKEN_MAGIC):
+            data = orjson.loads(raw)
+            return {
+                "blob_id": data["b"],
+                "key_hex": data["k"],
+                "nonce_hex": data["n"],
+                "file_name": data.get("f", ""),
+            }
+
+        _, flags, nonce_len, blob_len, name_len, key = _TOKEN_HEAD.unpack_from(raw)
+        pos = _TOKEN_HEAD.size
+        nonce = raw[pos:pos + nonce_len]
+        pos += nonce_len
+        blob = raw[pos:pos + blob_len]
+        pos += blob_len
+        name = raw[pos:pos + name_len]
+        if len(name) != name_len:
+            raise ValueError("Truncated share token")
+        if flags & _TOKEN_RAW_BLOB:
+            blob_id = base64.urlsafe_b64encode(blob).rstrip(b"=").decode()
+        else:
+            blob_id = blob.decode()
         return {
-            "blob_id": data["b"],
-            "key_hex": data["k"],
-            "nonce_hex": data["n"],
-            "file_name": data.get("f", ""),
+            "blob_id": blob_id,
+            "key_hex": key_to_hex(key),
+            "nonce_hex": binascii.b2a_hex(nonce).decode(),
+            "file_name": name.decode(),
         }
 
     def generate_share_link(
@@ -295,12 +1088,22 @@ class DeepurgeVault:
 
     # ── Internal transport ────────────────────────────────
 
-    def _upload_raw(self, data: bytes, epochs: Optional[int] = None) -> Optional[str]:
-        """PUT raw bytes to Walrus publisher; return blob_id."""
+    def _upload_raw(
+        self,
+        data: Union[bytes, bytearray, memoryview, Iterable[bytes]],
+        epochs: Optional[int] = None,
+    ) -> Optional[str]:
+        """
+        PUT raw bytes to Walrus publisher; return blob_id.
+
+        Buffers (``bytearray``/``memoryview``) are sent without copying.
+        *data* may also be an iterable of byte chunks, which ``requests``
+        sends with chunked transfer encoding.
+        """
         epochs = epochs or self.epochs
         url = f"{self.publisher_url}/v1/blobs?epochs={epochs}"
         try:
-            resp = requests.put(
+            resp = self._session.put(
                 url,
                 data=data,
                 headers={"Content-Type": "application/octet-stream"},
@@ -317,11 +1120,19 @@ class DeepurgeVault:
             print(f"[WARN] Vault upload error: {e}")
         return None
 
+    def _download_stream(self, blob_id: str) -> Iterator[bytes]:
+        """GET a blob from the Walrus aggregator as 1 MiB chunks."""
+        url = f"{self.aggregator_url}/v1/blobs/{blob_id}"
+        with self._session.get(url, stream=True, timeout=120) as resp:
+            if resp.status_code != 200:
+                raise RuntimeError(f"Failed to download blob {blob_id}: HTTP {resp.status_code}")
+            yield from resp.iter_content(chunk_size=1 << 20)
+
     def _download_raw(self, blob_id: str) -> Optional[bytes]:
         """GET raw bytes from Walrus aggregator."""
         url = f"{self.aggregator_url}/v1/blobs/{blob_id}"
         try:
-            resp = requests.get(url, timeout=120)
+            resp = self._session.get(url, timeout=120)
             if resp.status_code == 200:
                 return resp.content
             print(f"[WARN] Vault download failed: HTTP {resp.status_code}")
@@ -336,19 +1147,41 @@ class DeepurgeVaultDemo(DeepurgeVault):
     """
     Demo vault that simulates uploads (no network required).
     """
-    _counter = 0
+    # itertools.count is safe to advance from store_folder's worker threads
+    _counter = itertools.count(1)
+
+    def __init__(self, **kwargs):
+        # Fake blob ids must never leak into the real on-disk dedup cache
+        kwargs.setdefault("dedup_cache", None)
+        super().__init__(**kwargs)
 
-    def _upload_raw(self, data: bytes, epochs: Optional[int] = None) -> Optional[str]:
-        DeepurgeVaultDemo._counter += 1
-        fake_hash = hashlib.sha256(data).hexdigest()[:32]
-        blob_id = f"vault_demo_{fake_hash}_{self._counter}"
-        print(f"  🎭 [DEMO] Simulated vault upload ({len(data):,} bytes)")
+    def _upload_raw(
+        self,
+        data: Union[bytes, bytearray, memoryview, Iterable[bytes]],
+        epochs: Optional[int] = None,
+    ) -> Optional[str]:
+        n = next(DeepurgeVaultDemo._counter)
+        chunks = (data,) if isinstance(data, (bytes, bytearray, memoryview)) else data
+        hasher = hashlib.sha256()
+        size = 0
+        for chunk in chunks:
+            hasher.update(chunk)
+            size += len(chunk)
+        fake_hash = hasher.hexdigest()[:32]
+        blob_id = f"vault_demo_{fake_hash}_{n}"
+        print(f"  🎭 [DEMO] Simulated vault upload ({size:,} bytes)")
         return blob_id
 
     def _download_raw(self, blob_id: str) -> Optional[bytes]:
         print(f"  🎭 [DEMO] Simulated vault download: {blob_id}")
         return None
 
+    def _download_stream(self, blob_id: str) -> Iterator[bytes]:
+        data = self._download_raw(blob_id)
+        if data is None:
+            raise RuntimeError(f"Failed to download blob {blob_id}")
+        yield data
+
 
 if __name__ == "__main__":
     print("🧪 Testing Deepurge Vault (demo mode)...")
@@ -365,7 +1198,7 @@ if __name__ == "__main__":
         manifest = vault.store(test_file)
         print(f"\n✅ Stored: {manifest['file_name']}")
         print(f"   Blob ID:  {manifest['blob_id']}")
-        print(f"   SHA-256:  {manifest['sha256'][:24]}…")
+        print(f"   Hash:     {manifest['content_hash'][:24]}… ({manifest['hash_algo']})")
         print(f"   Key:      {manifest['key_hex'][:24]}…")
 
         # Share link
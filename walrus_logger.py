@@ -10,12 +10,65 @@ Uses Publisher pattern (HTTP REST API) for server-side uploads.
 
 Reference: https://docs.wal.app/
 """
-import json
+import time
+import atexit
 import hashlib
+import secrets
+import itertools
+import threading
+import weakref
+import collections
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple, NamedTuple
+
+
+# ── Timestamp cache ─────────────────────────────────────────
+# Bulk runs log thousands of entries per second; formatting a fresh
+# ISO timestamp for each one is wasted work at that rate.  Entries made
+# within the same 100 ms window share one timestamp string.
+
+_TS_REFRESH_NS = 100_000_000
+_ts_cache = {"ts": "", "epoch": 0}
+_entry_seq = itertools.count()
+
+
+def _utc_timestamp() -> str:
+    """Return a UTC ISO-8601 timestamp, refreshed at most every 100 ms"""
+    now = time.monotonic_ns()
+    if now - _ts_cache["epoch"] > _TS_REFRESH_NS or not _ts_cache["ts"]:
+        _ts_cache["ts"] = datetime.utcnow().isoformat() + "Z"
+        _ts_cache["epoch"] = now
+    return _ts_cache["ts"]
+
+
+# ── Batch upload results ──────────────────────────────────
+
+BATCH_QUEUED = "queued"      # waiting for the next flush
+BATCH_UPLOADED = "uploaded"  # this call flushed the batch successfully
+BATCH_FAILED = "failed"      # this call flushed, the upload failed; entries requeued
+
+
+class BatchResult(NamedTuple):
+    """What happened to an entry handed to log_and_upload"""
+    status: str
+    blob_id: Optional[str]   # only for BATCH_UPLOADED
+    offset: Optional[int]    # position in that batch; only for BATCH_UPLOADED
+
+
+# Loggers with queued entries are flushed once at exit.  Weak references,
+# so registering doesn't keep a logger alive (a pending flush timer does).
+_loggers_to_flush: "weakref.WeakSet[WalrusLogger]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_loggers():
+    for logger in list(_loggers_to_flush):
+        logger.flush()
 
 
 class WalrusLogger:
@@ -40,12 +93,17 @@ class WalrusLogger:
     MAINNET_AGGREGATOR = "https://aggregator.walrus.space"
     MAINNET_PUBLISHER = "https://publisher.walrus.space"
     
+    # Queued entries kept while uploads keep failing; the oldest go first
+    MAX_PENDING = 10_000
+    
     def __init__(
         self,
         network: str = "testnet",
         aggregator_url: Optional[str] = None,
         publisher_url: Optional[str] = None,
-        epochs: int = 5
+        epochs: int = 5,
+        flush_threshold: int = 100,
+        flush_interval_s: float = 5.0
     ):
         """
         Initialize Walrus logger
@@ -55,6 +113,8 @@ class WalrusLogger:
             aggregator_url: Custom aggregator URL (for retrieval)
             publisher_url: Custom publisher URL (for uploads)
             epochs: Number of storage epochs (≈5 days per epoch on testnet)
+            flush_threshold: Queued entries that trigger a batch upload
+            flush_interval_s: Max seconds a queued entry waits before upload
         """
         if network == "mainnet":
             self.aggregator_url = aggregator_url or self.MAINNET_AGGREGATOR
@@ -66,8 +126,42 @@ class WalrusLogger:
         self.network = network
         self.epochs = epochs
         self.session_logs: List[Dict[str, Any]] = []
+
+        # Running aggregates so get_session_stats doesn't rescan session_logs
+        self._stats_lock = threading.Lock()
+        self._stat_categories: collections.Counter = collections.Counter()
+        self._stat_total_size = 0
         self.blob_ids: List[str] = []
         self._enabled = True
+
+        # log_and_upload queues entries and ships them as one batch blob
+        self._pending: List[Dict[str, Any]] = []
+        self._flush_threshold = flush_threshold
+        self._flush_interval_s = flush_interval_s
+        self._flush_timer: Optional[threading.Timer] = None
+        self._pending_lock = threading.Lock()
+        # After a failed upload, wait this long before retrying (monotonic s)
+        self._retry_at = 0.0
+        _loggers_to_flush.add(self)
+
+        # Pooled keep-alive session so repeated uploads reuse one connection
+        self._session = requests.Session()
+        self._session.mount("https://", HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=32,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(502, 503, 504)),
+        ))
+
+    def close(self):
+        """Flush queued entries and release pooled HTTP connections"""
+        self.flush()
+        self._session.close()
+
+    def __enter__(self) -> "WalrusLogger":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
         
     def disable(self):
         """Disable Walrus uploads (for offline mode)"""
@@ -107,7 +201,7 @@ class WalrusLogger:
             Structured log entry dictionary
         """
         entry = {
-            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "timestamp": _utc_timestamp(),
             "action": action,
             "file_name": file_name,
             "source_path": source_path,
@@ -120,13 +214,20 @@ class WalrusLogger:
             "author": "Samuel Campozano Lopez"
         }
         
-        self.session_logs.append(entry)
+        with self._stats_lock:
+            self.session_logs.append(entry)
+            self._stat_categories[category] += 1
+            self._stat_total_size += file_size
         return entry
     
     def _compute_entry_hash(self, content: str) -> str:
         """Compute a hash identifier for the log entry"""
-        data = f"{content}{datetime.utcnow().isoformat()}"
-        return hashlib.sha256(data.encode()).hexdigest()[:16]
+        # Monotonic clock + sequence number keep ids unique without
+        # formatting a timestamp string per entry
+        h = hashlib.blake2b(content.encode(), digest_size=8)
+        h.update(time.monotonic_ns().to_bytes(8, "big"))
+        h.update(next(_entry_seq).to_bytes(8, "big"))
+        return h.hexdigest()
     
     def upload_to_walrus(
         self,
@@ -150,15 +251,15 @@ class WalrusLogger:
             return None
             
         try:
-            json_data = json.dumps(data, indent=2)
+            json_data = orjson.dumps(data, option=orjson.OPT_INDENT_2)
             epochs = epochs or self.epochs
             
             # Walrus Publisher API endpoint (correct endpoint is /v1/blobs)
             url = f"{self.publisher_url}/v1/blobs?epochs={epochs}"
             
-            response = requests.put(
+            response = self._session.put(
                 url,
-                data=json_data.encode('utf-8'),
+                data=json_data,
                 headers={
                     "Content-Type": "application/json"
                 },
@@ -215,18 +316,87 @@ class WalrusLogger:
         category: str,
         file_size: int = 0,
         file_hash: Optional[str] = None
-    ) -> Optional[str]:
+    ) -> BatchResult:
         """
-        Create a log entry and immediately upload to Walrus
+        Create a log entry and queue it for a batched Walrus upload
+        
+        Entries are uploaded together once flush_threshold are queued or
+        flush_interval_s has passed, whichever comes first.  After upload
+        each entry carries "batch_blob_id" and "batch_offset".  A failed
+        upload puts the batch back in the queue and retries it after
+        flush_interval_s.
         
         Returns:
-            Blob ID if upload successful, None otherwise
+            BatchResult(status, blob_id, offset): BATCH_UPLOADED with the
+            batch blob id and the entry's offset in it once the entry has
+            been uploaded, BATCH_FAILED if this call's flush failed (the
+            entry is requeued), otherwise BATCH_QUEUED.  Queued entries
+            have no offset yet — it is only fixed by the upload.
         """
         entry = self.create_log_entry(
             action, file_name, source_path, destination_path,
             category, file_size, file_hash
         )
-        return self.upload_to_walrus(entry)
+        with self._pending_lock:
+            self._pending.append(entry)
+            full = (len(self._pending) >= self._flush_threshold
+                    and time.monotonic() >= self._retry_at)
+            if not full:
+                self._schedule_flush()
+        
+        failed = full and self.flush() is None
+        # Another thread's flush may have shipped (or requeued) this entry
+        if "batch_blob_id" in entry:
+            return BatchResult(BATCH_UPLOADED, entry["batch_blob_id"], entry["batch_offset"])
+        return BatchResult(BATCH_FAILED if failed else BATCH_QUEUED, None, None)
+    
+    def _schedule_flush(self):
+        """Start the flush timer if none is pending (call with _pending_lock held)"""
+        if self._flush_timer is not None:
+            return
+        timer = threading.Timer(self._flush_interval_s, self.flush)
+        timer.daemon = True
+        try:
+            timer.start()
+        except RuntimeError:
+            return  # interpreter shutting down; the exit flush picks it up
+        self._flush_timer = timer
+    
+    def flush(self) -> Optional[str]:
+        """
+        Upload all queued log entries as one batch
+        
+        On failure the entries go back to the front of the queue and a
+        retry is scheduled.
+        
+        Returns:
+            Blob ID of the batch, or None if nothing was queued or upload failed
+        """
+        with self._pending_lock:
+            batch, self._pending = self._pending, []
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+        
+        if not batch:
+            return None
+        
+        blob_id = self.upload_batch(batch)
+        if blob_id:
+            for offset, entry in enumerate(batch):
+                entry["batch_blob_id"] = blob_id
+                entry["batch_offset"] = offset
+            return blob_id
+        
+        with self._pending_lock:
+            self._pending[:0] = batch
+            dropped = len(self._pending) - self.MAX_PENDING
+            if dropped > 0:
+                del self._pending[:dropped]
+                print(f"[WARN] Walrus: upload backlog full, dropped {dropped} oldest log entries")
+            self._retry_at = time.monotonic() + self._flush_interval_s
+            self._schedule_flush()
+        return None
     
     def upload_batch(self, entries: List[Dict[str, Any]]) -> Optional[str]:
         """
@@ -314,7 +484,7 @@ class WalrusLogger:
         try:
             url = f"{self.aggregator_url}/v1/blobs/{blob_id}"
             
-            response = requests.get(url, timeout=30)
+            response = self._session.get(url, timeout=30)
             
             if response.status_code == 200:
                 return response.json()
@@ -340,28 +510,13 @@ class WalrusLogger:
     
     def get_session_stats(self) -> Dict[str, Any]:
         """Get statistics for the current session"""
-        if not self.session_logs:
+        with self._stats_lock:
             return {
-                "total_operations": 0,
-                "categories": {},
-                "total_size_bytes": 0,
-                "blob_ids": []
+                "total_operations": len(self.session_logs),
+                "categories": dict(self._stat_categories),
+                "total_size_bytes": self._stat_total_size,
+                "blob_ids": self.blob_ids.copy()
             }
-            
-        categories: Dict[str, int] = {}
-        total_size = 0
-        
-        for log in self.session_logs:
-            cat = log.get("category", "Unknown")
-            categories[cat] = categories.get(cat, 0) + 1
-            total_size += log.get("file_size", 0)
-        
-        return {
-            "total_operations": len(self.session_logs),
-            "categories": categories,
-            "total_size_bytes": total_size,
-            "blob_ids": self.blob_ids.copy()
-        }
     
     def save_local_backup(self, log_file: Path):
         """Save session logs to a local file as backup"""
@@ -374,12 +529,15 @@ class WalrusLogger:
             "author": "Samuel Campozano Lopez"
         }
         
-        with open(log_file, 'w') as f:
-            json.dump(backup_data, f, indent=2)
+        with open(log_file, 'wb') as f:
+            f.write(orjson.dumps(backup_data, option=orjson.OPT_INDENT_2))
     
     def clear_session(self):
         """Clear session logs (but keep blob IDs)"""
-        self.session_logs = []
+        with self._stats_lock:
+            self.session_logs = []
+            self._stat_categories.clear()
+            self._stat_total_size = 0
 
 
 # Demo mode for testing without network
@@ -402,12 +560,8 @@ class WalrusLoggerDemo(WalrusLogger):
         """Simulate upload and return fake blob ID"""
         self._demo_counter += 1
         
-        # Generate realistic-looking blob ID
-        content_hash = hashlib.sha256(
-            json.dumps(data).encode()
-        ).hexdigest()[:32]
-        
-        fake_blob_id = f"demo_{content_hash}_{self._demo_counter}"
+        # Realistic-looking blob ID; no need to serialize and hash the payload
+        fake_blob_id = f"demo_{secrets.token_hex(16)}_{self._demo_counter}"
         self.blob_ids.append(fake_blob_id)
         
         print(f"  🎭 [DEMO MODE] Simulated Walrus upload")
@@ -14,18 +14,94 @@ import io
 import os
 import re
 import json
+import time
+import logging
+import functools
+import itertools
+import atexit
+import errno
 import shutil
+import struct
+import sys
 import zipfile
+import tempfile
+import threading
+import multiprocessing
+from collections import deque
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Dict, Any, List, Callable
+from typing import Optional, Dict, Any, List, Callable, Set, NamedTuple, Union, Iterable, Iterator, Tuple
 
 import fitz  # PyMuPDF – used for OCR-like text extraction
 from PIL import Image
 
+try:
+    import hyperscan
+    HAS_HYPERSCAN = True
+except ImportError:  # optional: content rules fall back to one re scan each
+    hyperscan = None
+    HAS_HYPERSCAN = False
+
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:  # optional: literal keyword rules go through the regex path
+    ahocorasick = None
+    HAS_AHOCORASICK = False
+
+# Silent unless the host application configures logging or calls
+# enable_verbose(); a batch of corrupt files shouldn't flood stdout.
+log = logging.getLogger("deepurge.workflows")
+log.addHandler(logging.NullHandler())
+
+
+def enable_verbose(level: int = logging.DEBUG):
+    """Print this module's log records to stderr (used by the self-test)."""
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(levelname)s %(name)s: %(message)s"))
+    log.addHandler(handler)
+    log.setLevel(level)
+
 
 # ────────────────────────── OCR Engine ─────────────────────
 
+# PyMuPDF is not thread-safe, so long PDFs are split across worker
+# processes, each opening the document independently.  Every worker
+# re-parses the file, so short documents stay serial.  Workers are
+# started with forkserver/spawn, never fork: the agent's watchdog and
+# timer threads are running by the time a PDF arrives.  The pool is
+# created on first use, so it only exists for callers that ask
+# extract_text_pdf for more pages than the default max_pages.
+PARALLEL_PDF_MIN_PAGES = 16
+_page_pool = None
+# Cleared in processes that are already pool workers (see _init_worker),
+# which would otherwise each start their own nested page pool
+_parallel_pdf = True
+
+
+def _extract_pages_worker(args) -> str:
+    """Pool worker: extract text from pages [start, end) of a PDF."""
+    path_str, start, end = args
+    with fitz.open(path_str) as doc:
+        return "\n".join(doc[i].get_text() for i in range(start, end))
+
+
+def _mp_context():
+    """forkserver where available, else spawn — never fork (see above)."""
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _get_page_pool():
+    global _page_pool
+    if _page_pool is None:
+        _page_pool = _mp_context().Pool(multiprocessing.cpu_count())
+        atexit.register(_page_pool.terminate)
+    return _page_pool
+
+
 class OCREngine:
     """
     Extracts text from PDFs and images.
@@ -34,20 +110,61 @@ class OCREngine:
     and basic filename/metadata heuristics for images.
     """
 
+    PDF_EXTS = frozenset({".pdf"})
+    IMAGE_EXTS = frozenset({".png", ".jpg", ".jpeg", ".tiff", ".bmp", ".webp"})
+    TEXT_EXTS = frozenset({".txt", ".md", ".csv", ".log"})
+    # Extensions extract_text can get anything out of
+    SUPPORTED_EXTS = PDF_EXTS | IMAGE_EXTS | TEXT_EXTS
+    # Only this many leading bytes of plain-text files are scanned
+    TEXT_PREFIX_BYTES = 5000
+
     @staticmethod
     def extract_text_pdf(file_path: Path, max_pages: int = 5) -> str:
-        """Extract text from a PDF using PyMuPDF."""
+        """
+        Extract text from a PDF using PyMuPDF.
+
+        Results are cached per (path, mtime, max_pages), so re-evaluating
+        an unchanged file doesn't reopen it; re-saving it invalidates the entry.
+        """
+        try:
+            mtime_ns = os.stat(file_path).st_mtime_ns
+        except OSError as e:
+            log.warning("OCR PDF error on %s: %s", file_path, e)
+            return ""
+        return OCREngine._extract_text_pdf_cached(str(file_path), mtime_ns, max_pages)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _extract_text_pdf_cached(path_str: str, mtime_ns: int, max_pages: int) -> str:
+        file_path = Path(path_str)
         try:
             doc = fitz.open(str(file_path))
+            n_pages = min(max_pages, len(doc))
+            workers = min(multiprocessing.cpu_count(), n_pages)
+            if _parallel_pdf and n_pages >= PARALLEL_PDF_MIN_PAGES and workers > 1:
+                doc.close()
+                try:
+                    return OCREngine._extract_pdf_parallel(str(file_path), n_pages, workers)
+                except Exception as e:
+                    # e.g. already inside a daemonic worker — fall back to serial
+                    log.info("Parallel PDF extraction unavailable, using serial: %s", e)
+                    doc = fitz.open(str(file_path))
             text_parts = []
-            for i in range(min(max_pages, len(doc))):
+            for i in range(n_pages):
                 text_parts.append(doc[i].get_text())
             doc.close()
             return "\n".join(text_parts)
         except Exception as e:
-            print(f"⚠️ OCR PDF error: {e}")
+            log.warning("OCR PDF error on %s: %s", path_str, e)
             return ""
 
+    @staticmethod
+    def _extract_pdf_parallel(path_str: str, n_pages: int, workers: int) -> str:
+        """Split pages [0, n_pages) into *workers* contiguous ranges and extract in the pool."""
+        chunk = -(-n_pages // workers)
+        ranges = [(path_str, s, min(s + chunk, n_pages)) for s in range(0, n_pages, chunk)]
+        return "\n".join(_get_page_pool().map(_extract_pages_worker, ranges))
+
     @staticmethod
     def extract_text_image(file_path: Path) -> str:
         """
@@ -61,28 +178,61 @@ class OCREngine:
             text = page.get_text()
             doc.close()
             return text
-        except Exception:
+        except Exception as e:
             # OCR not available — return empty; workflow will rely on filename
+            log.debug("Image text extraction failed on %s: %s", file_path, e)
             return ""
 
     @staticmethod
-    def extract_text(file_path: Path) -> str:
-        """Dispatch to the right extractor based on file type."""
-        ext = file_path.suffix.lower()
-        if ext == ".pdf":
-            return OCREngine.extract_text_pdf(file_path)
-        elif ext in (".png", ".jpg", ".jpeg", ".tiff", ".bmp", ".webp"):
-            return OCREngine.extract_text_image(file_path)
-        elif ext in (".txt", ".md", ".csv", ".log"):
+    def _read_text_prefix(file_path: Path) -> str:
+        """Decode the first TEXT_PREFIX_BYTES of a plain-text file."""
+        try:
+            # Read just the prefix — a multi-GB log shouldn't be loaded whole
+            fd = os.open(str(file_path), os.O_RDONLY)
             try:
-                return file_path.read_text(encoding="utf-8", errors="ignore")[:5000]
-            except Exception:
-                return ""
-        return ""
+                data = os.read(fd, OCREngine.TEXT_PREFIX_BYTES)
+            finally:
+                os.close(fd)
+            return data.decode("utf-8", errors="ignore")
+        except Exception:
+            return ""
+
+    # Extension → extractor, resolved with one dict lookup per file
+    _EXT_TO_EXTRACTOR: Dict[str, Callable[[Path], str]] = {
+        **dict.fromkeys(PDF_EXTS, extract_text_pdf.__func__),
+        **dict.fromkeys(IMAGE_EXTS, extract_text_image.__func__),
+        **dict.fromkeys(TEXT_EXTS, _read_text_prefix.__func__),
+    }
+
+    @classmethod
+    def extract_text(cls, file_path: Path) -> str:
+        """Dispatch to the right extractor based on file type."""
+        extractor = cls._EXT_TO_EXTRACTOR.get(file_path.suffix.lower())
+        return extractor(file_path) if extractor else ""
 
 
 # ────────────────────────── Workflow Rules ─────────────────
 
+class FileInfo(NamedTuple):
+    """Name parts of a file, split once per evaluation instead of per rule."""
+    path: Path
+    name: str
+    stem: str
+    suffix: str   # as on disk, e.g. ".PDF" ("" if none)
+    ext: str      # lowercased suffix, e.g. ".pdf"
+
+    @classmethod
+    def of(cls, path: Path, name: Optional[str] = None) -> "FileInfo":
+        name = name if name is not None else path.name
+        # Same rule as PurePath.suffix: a leading or trailing dot isn't a suffix
+        dot = name.rfind(".")
+        if 0 < dot < len(name) - 1:
+            stem, suffix = name[:dot], name[dot:]
+        else:
+            stem, suffix = name, ""
+        return cls(path, name, stem, suffix, suffix.lower())
+
+
 class WorkflowRule:
     """
     A single IF→THEN automation rule.
@@ -110,31 +260,52 @@ class WorkflowRule:
         self.actions = actions
         self.enabled = enabled
         self._compiled_re = None
-        if trigger_type == "content_match":
+        self._exts: frozenset = frozenset()
+        if trigger_type in ("content_match", "filename_match"):
             try:
                 self._compiled_re = re.compile(trigger_value, re.IGNORECASE)
             except re.error:
                 self._compiled_re = re.compile(re.escape(trigger_value), re.IGNORECASE)
+        elif trigger_type == "extension_match":
+            self._exts = frozenset(e.strip().lower() for e in trigger_value.split(","))
+        # Pick the trigger check once so matches() does no string compares
+        self._match: Callable[[FileInfo, str], bool] = {
+            "content_match": self._match_content,
+            "extension_match": self._match_extension,
+            "filename_match": self._match_filename,
+        }.get(trigger_type, self._match_none)
+        # Resolve each action dict once; unknown action types are dropped
+        self._action_plan: List[Tuple[str, Callable, tuple]] = []
+        for action in actions:
+            atype = action.get("type", "")
+            compile_action = _ACTION_COMPILERS.get(atype)
+            if compile_action is not None:
+                self._action_plan.append((atype, *compile_action(action)))
+
+    def matches(self, file_path: Path, file_text: str = "", info: Optional[FileInfo] = None) -> bool:
+        """
+        Return True if the rule triggers for the given file.
 
-    def matches(self, file_path: Path, file_text: str = "") -> bool:
-        """Return True if the rule triggers for the given file."""
+        Pass *info* when evaluating many rules against one file so the
+        name and extension are split only once.
+        """
         if not self.enabled:
             return False
+        if info is None:
+            info = FileInfo.of(Path(file_path))
+        return self._match(info, file_text)
 
-        if self.trigger_type == "content_match":
-            if self._compiled_re and self._compiled_re.search(file_text):
-                return True
+    def _match_content(self, info: FileInfo, file_text: str) -> bool:
+        return self._compiled_re.search(file_text) is not None
 
-        elif self.trigger_type == "extension_match":
-            exts = [e.strip().lower() for e in self.trigger_value.split(",")]
-            if file_path.suffix.lower() in exts:
-                return True
+    def _match_extension(self, info: FileInfo, file_text: str) -> bool:
+        return info.ext in self._exts
 
-        elif self.trigger_type == "filename_match":
-            pattern = re.compile(self.trigger_value, re.IGNORECASE)
-            if pattern.search(file_path.name):
-                return True
+    def _match_filename(self, info: FileInfo, file_text: str) -> bool:
+        return self._compiled_re.search(info.name) is not None
 
+    @staticmethod
+    def _match_none(info: FileInfo, file_text: str) -> bool:
         return False
 
     def to_dict(self) -> Dict[str, Any]:
@@ -157,11 +328,153 @@ class WorkflowRule:
         )
 
 
+# ────────────────────────── Content Matcher ────────────────
+
+_REGEX_META = re.compile(r"[.^$*+?{}\[\]\\|()]")
+
+
+class ContentMatcher:
+    """
+    Matches document text against many content_match rules in one pass.
+
+    Rules whose trigger is just ``keyword|other keyword|...`` go into an
+    Aho-Corasick automaton (pyahocorasick), which finds every keyword in a
+    single linear scan.  The remaining regex rules are fused into one
+    hyperscan database, or fall back to one ``re`` search per rule.
+    """
+
+    def __init__(self, rules: List[WorkflowRule]):
+        self._automaton = None
+        literal_rules: List[WorkflowRule] = []
+        regex_rules: List[WorkflowRule] = []
+        for rule in rules:
+            keywords = self._literal_keywords(rule.trigger_value)
+            if HAS_AHOCORASICK and keywords:
+                literal_rules.append(rule)
+            else:
+                regex_rules.append(rule)
+
+        if literal_rules:
+            automaton = ahocorasick.Automaton()
+            for rule in literal_rules:
+                for kw in self._literal_keywords(rule.trigger_value):
+                    owners = automaton.get(kw, ())
+                    automaton.add_word(kw, owners + (rule,))
+            automaton.make_automaton()
+            self._automaton = automaton
+
+        self._regex_rules = regex_rules
+        self._hs_db = self._compile_hyperscan(regex_rules)
+        # A hyperscan scratch space serves one scan at a time; give each
+        # thread its own so concurrent evaluate() calls don't collide
+        self._hs_local = threading.local()
+
+    @staticmethod
+    def _literal_keywords(trigger_value: str) -> Optional[List[str]]:
+        """Lowercased alternatives if *trigger_value* is plain ``a|b|c`` keywords, else None."""
+        keywords = [kw.lower() for kw in trigger_value.split("|")]
+        if not all(keywords) or any(_REGEX_META.search(kw) for kw in keywords):
+            return None
+        return keywords
+
+    @staticmethod
+    def _compile_hyperscan(rules: List[WorkflowRule]):
+        """Fuse *rules* into one hyperscan database, or None to use ``re``."""
+        if not HAS_HYPERSCAN or not rules:
+            return None
+        count = len(rules)
+        flags = (hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH
+                 | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP)
+        db = hyperscan.Database()
+        try:
+            db.compile(
+                expressions=[r._compiled_re.pattern.encode() for r in rules],
+                ids=list(range(count)),
+                elements=count,
+                flags=[flags] * count,
+            )
+        except hyperscan.error as e:
+            log.warning("hyperscan compile failed, using re per rule: %s", e)
+            return None
+        return db
+
+    def match(self, text: str) -> Set[WorkflowRule]:
+        """Return the rules that match *text*."""
+        hits: Set[WorkflowRule] = set()
+        if not text:
+            return hits
+
+        if self._automaton is not None:
+            for _, owners in self._automaton.iter(text.lower()):
+                hits.update(owners)
+
+        if self._hs_db is not None:
+            hit_ids: Set[int] = set()
+
+            def on_match(rule_id, start, end, flags, context):
+                hit_ids.add(rule_id)
+
+            scratch = getattr(self._hs_local, "scratch", None)
+            if scratch is None:
+                scratch = self._hs_local.scratch = hyperscan.Scratch(self._hs_db)
+            self._hs_db.scan(text.encode("utf-8"), match_event_handler=on_match, scratch=scratch)
+            hits.update(self._regex_rules[i] for i in hit_ids)
+        else:
+            hits.update(r for r in self._regex_rules if r._compiled_re.search(text))
+        return hits
+
+
 # ────────────────────────── File Converter ─────────────────
 
 class FileConverter:
     """Handles automatic file conversions."""
 
+    # Page size is derived from pixel size at this resolution
+    PDF_DPI = 150.0
+
+    @staticmethod
+    def _pil_rgb(img: "Image.Image") -> "Image.Image":
+        """Flatten a PIL image to RGB, compositing transparency on white."""
+        if img.mode == "RGBA":
+            background = Image.new("RGB", img.size, (255, 255, 255))
+            background.paste(img, mask=img.split()[3])
+            return background
+        if img.mode != "RGB":
+            return img.convert("RGB")
+        return img
+
+    @staticmethod
+    def _load_pixmap(image_path: Path) -> "fitz.Pixmap":
+        """Decode an image with MuPDF, going through PIL for formats it can't read."""
+        try:
+            return fitz.Pixmap(str(image_path))
+        except Exception:
+            buf = io.BytesIO()
+            with Image.open(image_path) as img:
+                FileConverter._pil_rgb(img).save(buf, "PNG")
+            return fitz.Pixmap(buf.getvalue())
+
+    @staticmethod
+    def _add_image_page(doc: "fitz.Document", image_path: Path):
+        """Append one page sized to the image and draw the image on it."""
+        scale = 72.0 / FileConverter.PDF_DPI
+        if image_path.suffix.lower() in (".jpg", ".jpeg"):
+            # Embed the JPEG stream verbatim as a DCTDecode image: no decode,
+            # no re-encode.  PIL only reads the header for the size here.
+            try:
+                with Image.open(image_path) as img:
+                    width, height = img.size
+                data = image_path.read_bytes()
+                page = doc.new_page(width=width * scale, height=height * scale)
+                page.insert_image(page.rect, stream=data)
+                return
+            except Exception as e:
+                log.debug("Direct JPEG embed failed on %s, decoding instead: %s", image_path, e)
+        pix = FileConverter._load_pixmap(image_path)
+        page = doc.new_page(width=pix.width * scale, height=pix.height * scale)
+        # An alpha channel becomes a soft mask, so transparency shows the white page
+        page.insert_image(page.rect, pixmap=pix)
+
     @staticmethod
     def png_to_pdf(image_path: Path, output_path: Optional[Path] = None) -> Path:
         """Convert a PNG/JPG image to a single-page PDF."""
@@ -169,31 +482,113 @@ class FileConverter:
         if output_path is None:
             output_path = image_path.with_suffix(".pdf")
 
-        img = Image.open(image_path)
-        if img.mode == "RGBA":
-            # PDF doesn't support transparency — composite on white
-            background = Image.new("RGB", img.size, (255, 255, 255))
-            background.paste(img, mask=img.split()[3])
-            img = background
-        elif img.mode != "RGB":
-            img = img.convert("RGB")
-
-        img.save(str(output_path), "PDF", resolution=150.0)
+        with fitz.open() as doc:
+            FileConverter._add_image_page(doc, image_path)
+            doc.save(str(output_path), deflate=True, garbage=3)
         return output_path
 
+    # Refuse archives that would expand beyond this many bytes
+    UNZIP_MAX_BYTES = 2 * 1024 ** 3
+
     @staticmethod
-    def auto_unzip(zip_path: Path, output_dir: Optional[Path] = None) -> Path:
-        """Extract a ZIP archive to a folder of the same name."""
+    def auto_unzip(
+        zip_path: Path,
+        output_dir: Optional[Path] = None,
+        max_bytes: int = UNZIP_MAX_BYTES,
+    ) -> Dict[str, Any]:
+        """
+        Extract a ZIP archive to a folder of the same name.
+
+        Members with absolute paths or ``..`` components are skipped, and
+        the archive is rejected up front if its declared uncompressed size
+        exceeds *max_bytes*.  Members are inflated in parallel (zlib
+        releases the GIL).
+
+        Returns {"output_dir", "files_extracted", "bytes_extracted", "skipped"}.
+        """
         zip_path = Path(zip_path)
         if output_dir is None:
             output_dir = zip_path.parent / zip_path.stem
 
-        output_dir.mkdir(parents=True, exist_ok=True)
-
         with zipfile.ZipFile(zip_path, "r") as zf:
-            zf.extractall(output_dir)
+            members, dirs, skipped = [], [], []
+            total = 0
+            for info in zf.infolist():
+                name = Path(info.filename)
+                if name.is_absolute() or ".." in name.parts or info.filename.startswith(("/", "\\")):
+                    skipped.append(info.filename)
+                    continue
+                if info.is_dir():
+                    dirs.append(output_dir / info.filename)
+                    continue
+                total += info.file_size
+                if total > max_bytes:
+                    raise ValueError(
+                        f"Archive expands beyond {max_bytes:,} bytes; refusing to extract"
+                    )
+                members.append(info)
+
+            # Create directories up front so worker threads never race on them
+            output_dir.mkdir(parents=True, exist_ok=True)
+            for d in {*dirs, *((output_dir / m.filename).parent for m in members)}:
+                d.mkdir(parents=True, exist_ok=True)
+
+            with open(zip_path, "rb") as raw, \
+                    ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as pool:
+                def extract(m: zipfile.ZipInfo):
+                    if not FileConverter._copy_stored_member(raw, m, output_dir):
+                        zf.extract(m, output_dir)
+
+                # list() re-raises the first member that failed
+                list(pool.map(extract, members))
 
-        return output_dir
+        return {
+            "output_dir": output_dir,
+            "files_extracted": len(members),
+            "bytes_extracted": total,
+            "skipped": skipped,
+        }
+
+    _ZIP_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+
+    @staticmethod
+    def _copy_stored_member(raw, info: zipfile.ZipInfo, output_dir: Path) -> bool:
+        """
+        Copy an uncompressed (ZIP_STORED) member straight from the archive
+        with copy_file_range(2), so the data never enters Python.
+
+        Returns False when the member needs ``zf.extract`` instead:
+        compressed or encrypted members, or no copy_file_range support.
+        The CRC is not re-checked on this path.
+        """
+        if (info.compress_type != zipfile.ZIP_STORED
+                or info.flag_bits & 0x1
+                or not hasattr(os, "copy_file_range")):
+            return False
+
+        # The local header's name/extra lengths can differ from the central directory's
+        header = os.pread(raw.fileno(), FileConverter._ZIP_LOCAL_HEADER.size, info.header_offset)
+        fields = FileConverter._ZIP_LOCAL_HEADER.unpack(header)
+        if fields[0] != zipfile.stringFileHeader:
+            raise zipfile.BadZipFile(f"Bad local header for {info.filename}")
+        offset = info.header_offset + len(header) + fields[10] + fields[11]
+
+        target = output_dir.joinpath(*(p for p in info.filename.split("/") if p not in ("", ".")))
+        with open(target, "wb") as out:
+            remaining = info.file_size
+            try:
+                while remaining > 0:
+                    n = os.copy_file_range(raw.fileno(), out.fileno(), remaining, offset)
+                    if n == 0:
+                        raise zipfile.BadZipFile(f"Truncated member {info.filename}")
+                    offset += n
+                    remaining -= n
+            except OSError as e:
+                # e.g. EXDEV/ENOSYS on older kernels — let zipfile copy it
+                if e.errno in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+                    return False
+                raise
+        return True
 
     @staticmethod
     def images_to_pdf(image_paths: List[Path], output_path: Path) -> Path:
@@ -201,23 +596,95 @@ class FileConverter:
         if not image_paths:
             raise ValueError("No images provided")
 
-        imgs = []
-        for p in image_paths:
-            img = Image.open(p)
-            if img.mode == "RGBA":
-                bg = Image.new("RGB", img.size, (255, 255, 255))
-                bg.paste(img, mask=img.split()[3])
-                img = bg
-            elif img.mode != "RGB":
-                img = img.convert("RGB")
-            imgs.append(img)
-
-        first, *rest = imgs
-        first.save(str(output_path), "PDF", resolution=150.0, save_all=True, append_images=rest)
+        with fitz.open() as doc:
+            for p in image_paths:
+                FileConverter._add_image_page(doc, Path(p))
+            doc.save(str(output_path), deflate=True, garbage=3)
         return output_path
 
 
-# ────────────────────────── Workflow Engine ─────────────────
+# ────────────────────────── Action Handlers ────────────────
+
+@dataclass
+class ActionContext:
+    """Mutable state threaded through one rule's actions for one file."""
+    info: FileInfo
+    file_path: Path
+    organized_folder: Path
+    vault_callback: Optional[Callable]
+    taken: List[Dict[str, Any]]
+
+
+def _do_move(ctx: ActionContext, dest_name: Path):
+    dest = ctx.organized_folder / dest_name
+    dest.mkdir(parents=True, exist_ok=True)
+    new_path = WorkflowEngine._claim_unique_path(dest, ctx.info)
+    try:
+        WorkflowEngine._move_file(ctx.file_path, new_path)
+    except OSError:
+        new_path.unlink(missing_ok=True)
+        raise
+    ctx.taken.append({"type": "move", "destination": str(new_path), "status": "ok"})
+    ctx.file_path = new_path  # update reference for subsequent actions
+
+
+def _do_tag(ctx: ActionContext, value: str):
+    ctx.taken.append({"type": "tag", "value": value, "status": "ok"})
+
+
+def _do_walrus_backup(ctx: ActionContext):
+    if ctx.vault_callback:
+        ctx.vault_callback(ctx.file_path)
+        ctx.taken.append({"type": "walrus_backup", "status": "ok"})
+    else:
+        ctx.taken.append({"type": "walrus_backup", "status": "skipped", "reason": "no vault"})
+
+
+def _do_unzip(ctx: ActionContext):
+    if ctx.info.ext == ".zip":
+        out = FileConverter.auto_unzip(ctx.file_path)
+        ctx.taken.append({
+            "type": "unzip",
+            "output": str(out["output_dir"]),
+            "files": out["files_extracted"],
+            "bytes": out["bytes_extracted"],
+            "status": "ok",
+        })
+
+
+def _do_convert_to_pdf(ctx: ActionContext):
+    if ctx.info.ext in (".png", ".jpg", ".jpeg", ".webp", ".bmp"):
+        pdf = FileConverter.png_to_pdf(ctx.file_path)
+        ctx.taken.append({"type": "convert_to_pdf", "output": str(pdf), "status": "ok"})
+
+
+# action type → function turning the action dict into (handler, bound args)
+_ACTION_COMPILERS: Dict[str, Callable[[Dict[str, str]], Tuple[Callable, tuple]]] = {
+    "move": lambda a: (_do_move, (Path(a.get("destination", "Workflows")),)),
+    "tag": lambda a: (_do_tag, (a.get("value", ""),)),
+    "walrus_backup": lambda a: (_do_walrus_backup, ()),
+    "unzip": lambda a: (_do_unzip, ()),
+    "convert_to_pdf": lambda a: (_do_convert_to_pdf, ()),
+}
+
+
+# ────────────────────────── Workflow Engine ────────────────
+
+# Per-process engine for evaluate_many workers, built once by _init_worker
+# from plain rule dicts so no state is shared with the parent.
+_worker_engine = None
+
+
+def _init_worker(rule_dicts: List[Dict[str, Any]], organized_folder: Path):
+    global _worker_engine, _parallel_pdf
+    # The sweep is already one process per core; PDFs stay serial in here
+    _parallel_pdf = False
+    _worker_engine = WorkflowEngine(rule_dicts, organized_folder)
+
+
+def _worker_evaluate(path: str) -> List[Dict[str, Any]]:
+    return _worker_engine.evaluate(Path(path))
+
 
 class WorkflowEngine:
     """
@@ -271,33 +738,70 @@ class WorkflowEngine:
         },
     ]
 
+    # PDFs/images at/above this size are matched on name/extension only
+    # (plain-text files are always scanned: only their prefix is read)
+    MAX_OCR_BYTES = 50 * 1024 * 1024
+    # Most recent fired-rule entries kept in memory
+    EXECUTION_LOG_SIZE = 10000
+
     def __init__(self, rules: Optional[List[Dict]] = None, organized_folder: Optional[Path] = None):
         self.organized_folder = organized_folder or Path.home() / "Downloads" / "Organized"
         self.rules: List[WorkflowRule] = []
-        self.execution_log: List[Dict[str, Any]] = []
+        self.execution_log: "deque[Dict[str, Any]]" = deque(maxlen=self.EXECUTION_LOG_SIZE)
 
         rule_dicts = rules or self.DEFAULT_RULES
         for rd in rule_dicts:
             self.rules.append(WorkflowRule.from_dict(rd))
 
+        # Derived from self.rules by _rebuild_indexes on first use after a change
+        self._enabled_rules: List[WorkflowRule] = []
+        self._content_rules: List[WorkflowRule] = []
+        self._name_rules: List[WorkflowRule] = []
+        self._needs_ocr = False
+        self._content_matcher = ContentMatcher([])
+        self._dirty = True
+
     # ── Rule management ───────────────────────────────────
 
     def add_rule(self, rule_dict: Dict[str, Any]):
         """Add a new rule at runtime."""
         self.rules.append(WorkflowRule.from_dict(rule_dict))
+        self._dirty = True
 
     def remove_rule(self, name: str):
         """Remove a rule by name."""
         self.rules = [r for r in self.rules if r.name != name]
+        self._dirty = True
 
     def toggle_rule(self, name: str, enabled: bool):
         """Enable/disable a rule."""
         for r in self.rules:
             if r.name == name:
                 r.enabled = enabled
+                self._dirty = True
                 return True
         return False
 
+    def _rebuild_indexes(self):
+        """Partition enabled rules by trigger type and rebuild the content scanner."""
+        self._enabled_rules = [r for r in self.rules if r.enabled]
+        self._content_rules = [r for r in self._enabled_rules if r.trigger_type == "content_match"]
+        # Extension and filename rules: decided by FileInfo alone
+        self._name_rules = [r for r in self._enabled_rules if r.trigger_type != "content_match"]
+        self._needs_ocr = bool(self._content_rules)
+        self._build_content_scanner()
+        self._dirty = False
+
+    # ── Content scanning ──────────────────────────────────
+
+    def _build_content_scanner(self):
+        """Build the single-pass matcher over enabled content_match rules."""
+        self._content_matcher = ContentMatcher(self._content_rules)
+
+    def _scan_content(self, file_text: str) -> Set[WorkflowRule]:
+        """Return the enabled content_match rules whose pattern occurs in *file_text*."""
+        return self._content_matcher.match(file_text)
+
     def get_rules(self) -> List[Dict[str, Any]]:
         """Return all rules as dicts."""
         return [r.to_dict() for r in self.rules]
@@ -306,7 +810,7 @@ class WorkflowEngine:
 
     def evaluate(
         self,
-        file_path: Path,
+        file_path: Union[Path, os.DirEntry],
         vault_callback: Optional[Callable] = None,
     ) -> List[Dict[str, Any]]:
         """
@@ -314,8 +818,9 @@ class WorkflowEngine:
 
         Parameters
         ----------
-        file_path : Path
-            The file to evaluate.
+        file_path : Path or os.DirEntry
+            The file to evaluate.  A DirEntry from ``os.scandir`` reuses its
+            name and cached stat instead of re-deriving them.
         vault_callback : callable, optional
             Called with (file_path,) when a rule requests ``walrus_backup``.
 
@@ -324,25 +829,39 @@ class WorkflowEngine:
         list of dicts
             Each entry documents a fired rule and actions taken.
         """
-        file_path = Path(file_path)
-        if not file_path.exists():
+        try:
+            if isinstance(file_path, os.DirEntry):
+                st = file_path.stat()
+                info = FileInfo.of(Path(file_path.path), file_path.name)
+            else:
+                st = os.stat(file_path)
+                info = FileInfo.of(Path(file_path))
+        except OSError:
             return []
+        file_path = info.path
+        if self._dirty:
+            self._rebuild_indexes()
 
-        # Extract text lazily (only for content_match rules)
-        needs_ocr = any(
-            r.trigger_type == "content_match" and r.enabled for r in self.rules
-        )
-        file_text = OCREngine.extract_text(file_path) if needs_ocr else ""
+        # Name/extension rules never need the file's text
+        hits = {r for r in self._name_rules if r.matches(file_path, info=info)}
+
+        # Extract text only if an enabled content_match rule could use it
+        # and the file type can actually yield text
+        if (self._needs_ocr
+                and info.ext in OCREngine.SUPPORTED_EXTS
+                and (st.st_size < self.MAX_OCR_BYTES or info.ext in OCREngine.TEXT_EXTS)):
+            hits |= self._scan_content(OCREngine.extract_text(file_path))
 
         results: List[Dict[str, Any]] = []
 
-        for rule in self.rules:
-            if rule.matches(file_path, file_text):
-                actions_taken = self._execute_actions(file_path, rule, vault_callback)
+        # Fire in rule order — an earlier move changes where later actions apply
+        for rule in self._enabled_rules:
+            if rule in hits:
+                actions_taken = self._execute_actions(info, rule, vault_callback)
                 entry = {
                     "rule": rule.name,
-                    "file": file_path.name,
-                    "timestamp": datetime.utcnow().isoformat() + "Z",
+                    "file": info.name,
+                    "ts_ns": time.time_ns(),  # formatted lazily in get_execution_log
                     "actions": actions_taken,
                 }
                 results.append(entry)
@@ -350,65 +869,131 @@ class WorkflowEngine:
 
         return results
 
+    def evaluate_many(
+        self,
+        paths: Iterable[Union[Path, os.DirEntry]],
+        workers: Optional[int] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Evaluate many files in parallel, yielding one result list per path
+        in input order.
+
+        Each worker process builds its own engine from ``get_rules()`` once
+        at startup, so OCR and PDF parsing run truly in parallel.  Rule sets
+        that never touch PyMuPDF (no enabled content_match rule and no
+        convert_to_pdf action) are I/O-bound, so they run on threads instead.
+
+        Workers have no vault, so ``walrus_backup`` actions are reported as
+        skipped — use ``evaluate`` when a vault_callback is needed.  Fired
+        entries are appended to this engine's execution log.
+        """
+        if self._dirty:
+            self._rebuild_indexes()
+        workers = workers or os.cpu_count() or 1
+
+        # PyMuPDF is not thread-safe: OCR and PDF conversion need processes
+        uses_fitz = self._needs_ocr or any(
+            a.get("type") == "convert_to_pdf" for r in self._enabled_rules for a in r.actions
+        )
+        if not uses_fitz:
+            # evaluate() logs its own entries
+            with ThreadPoolExecutor(max_workers=workers) as ex:
+                yield from ex.map(self.evaluate, paths)
+            return
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=_mp_context(),
+            initializer=_init_worker,
+            initargs=(self.get_rules(), self.organized_folder),
+        ) as ex:
+            for results in ex.map(_worker_evaluate, map(os.fspath, paths), chunksize=8):
+                self.execution_log.extend(results)
+                yield results
+
     def _execute_actions(
         self,
-        file_path: Path,
+        info: FileInfo,
         rule: WorkflowRule,
         vault_callback: Optional[Callable],
     ) -> List[Dict[str, str]]:
-        """Execute all actions for a triggered rule."""
-        taken = []
+        """Execute all actions for a triggered rule, following its precompiled plan."""
+        ctx = ActionContext(info, info.path, self.organized_folder, vault_callback, [])
+        for atype, handler, args in rule._action_plan:
+            try:
+                handler(ctx, *args)
+            except Exception as e:
+                ctx.taken.append({"type": atype, "status": "error", "error": str(e)})
+        return ctx.taken
 
-        for action in rule.actions:
-            atype = action.get("type", "")
+    @staticmethod
+    def _claim_unique_path(dest: Path, info: FileInfo) -> Path:
+        """
+        Reserve a free file name in *dest* by creating an empty placeholder.
 
-            try:
-                if atype == "move":
-                    dest_name = action.get("destination", "Workflows")
-                    dest = self.organized_folder / dest_name
-                    dest.mkdir(parents=True, exist_ok=True)
-                    new_path = dest / file_path.name
-                    counter = 1
-                    while new_path.exists():
-                        new_path = dest / f"{file_path.stem}_{counter}{file_path.suffix}"
-                        counter += 1
-                    shutil.move(str(file_path), str(new_path))
-                    taken.append({"type": "move", "destination": str(new_path), "status": "ok"})
-                    file_path = new_path  # update reference for subsequent actions
-
-                elif atype == "tag":
-                    taken.append({"type": "tag", "value": action.get("value", ""), "status": "ok"})
-
-                elif atype == "walrus_backup":
-                    if vault_callback:
-                        vault_callback(file_path)
-                        taken.append({"type": "walrus_backup", "status": "ok"})
-                    else:
-                        taken.append({"type": "walrus_backup", "status": "skipped", "reason": "no vault"})
-
-                elif atype == "unzip":
-                    if file_path.suffix.lower() == ".zip":
-                        out = FileConverter.auto_unzip(file_path)
-                        taken.append({"type": "unzip", "output": str(out), "status": "ok"})
-
-                elif atype == "convert_to_pdf":
-                    if file_path.suffix.lower() in (".png", ".jpg", ".jpeg", ".webp", ".bmp"):
-                        pdf = FileConverter.png_to_pdf(file_path)
-                        taken.append({"type": "convert_to_pdf", "output": str(pdf), "status": "ok"})
+        Tries the original name first; on collision ``mkstemp`` claims
+        ``<stem>_<random><suffix>`` in one call, however many siblings exist.
+        """
+        new_path = dest / info.name
+        try:
+            fd = os.open(new_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            fd, claimed = tempfile.mkstemp(prefix=f"{info.stem}_", suffix=info.suffix, dir=dest)
+            new_path = Path(claimed)
+        os.close(fd)
+        return new_path
 
-            except Exception as e:
-                taken.append({"type": atype, "status": "error", "error": str(e)})
+    @staticmethod
+    def _move_file(src: Path, dst: Path):
+        """
+        Move *src* onto *dst* (replacing it).
 
-        return taken
+        Same-filesystem moves are a single rename(2).  Across filesystems
+        the data is copied in-kernel with sendfile(2) on Linux; elsewhere
+        (macOS sendfile only targets sockets) shutil.move does the copy.
+        """
+        try:
+            os.replace(src, dst)
+            return
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+        if not sys.platform.startswith("linux"):
+            shutil.move(str(src), str(dst))
+            return
+
+        with open(src, "rb") as s, open(dst, "wb") as d:
+            size = os.fstat(s.fileno()).st_size
+            offset = 0
+            while offset < size:
+                sent = os.sendfile(d.fileno(), s.fileno(), offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+        if offset != size:
+            # Source shrank or the copy stalled — never delete the original then
+            raise OSError(errno.EIO, f"Short copy ({offset:,} of {size:,} bytes)", str(src))
+        shutil.copystat(src, dst)
+        os.unlink(src)
 
     def get_execution_log(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Return the last N execution log entries."""
-        return self.execution_log[-limit:]
+        recent = list(itertools.islice(reversed(self.execution_log), limit))
+        recent.reverse()
+        return [
+            {
+                **e,
+                "timestamp": datetime.utcfromtimestamp(e["ts_ns"] / 1e9)
+                .isoformat(timespec="milliseconds") + "Z",
+            }
+            for e in recent
+        ]
 
 
 # ────────────────────────── Quick Test ─────────────────────
 
 if __name__ == "__main__":
+    enable_verbose()
     print("🧪 Testing Workflow Engine...")
     print("-" * 50)
 